@@ -0,0 +1,1133 @@
+/*
+ * Native core of the Double Metaphone algorithm.
+ *
+ * This is a line-for-line port of the handlers in metaphone.py; it works
+ * on the upper-cased, ASCII-encoded form of the word produced by Word, so
+ * every comparison is a byte compare rather than a Python string slice. Any
+ * behavioural change made to the Python version must be made here as well.
+ */
+#define PY_SSIZE_T_CLEAN
+#include <Python.h>
+#include <stdint.h>
+#include <string.h>
+
+/* the rules look a few characters behind and ahead of the current position */
+#define PAD 8
+
+#define IN(c, set) (memchr((set), (c), sizeof(set) - 1) != NULL)
+
+/* vowels are looked up on nearly every rule, so test them with a table */
+static const unsigned char vowels[256] = {
+    ['A'] = 1, ['E'] = 1, ['I'] = 1, ['O'] = 1, ['U'] = 1, ['Y'] = 1,
+};
+
+#define IS_VOWEL(c) (vowels[(unsigned char)(c)])
+
+/*
+ * The rules compare the characters around the current position against
+ * literals of up to six characters. Rather than comparing strings, load eight
+ * characters at once into a little-endian integer and compare it, masked to
+ * the length of the literal, against the literal packed the same way; the
+ * packing of a string literal folds to a constant at compile time. A test
+ * against a set of literals, such as ORCHES/ARCHIT/ORCHID, is then one mask
+ * and a compare with an immediate per literal, which is cheaper than hashing
+ * the window would be for sets this small.
+ */
+#define PACKED(lit, i) \
+    ((i) < sizeof(lit) - 1 \
+     ? (uint64_t)(unsigned char)(lit)[(i) < sizeof(lit) ? (i) : 0] \
+       << (8 * (i)) \
+     : 0)
+#define PACK(lit) \
+    (PACKED(lit, 0) | PACKED(lit, 1) | PACKED(lit, 2) | PACKED(lit, 3) \
+     | PACKED(lit, 4) | PACKED(lit, 5) | PACKED(lit, 6) | PACKED(lit, 7))
+#define MASK(lit) \
+    (sizeof(lit) - 1 >= 8 \
+     ? ~(uint64_t)0 : ((uint64_t)1 << (8 * (sizeof(lit) - 1))) - 1)
+#define WAT(win, lit) (((win) & MASK(lit)) == PACK(lit))
+
+static inline uint64_t
+window(const char *p)
+{
+    uint64_t win;
+#if PY_LITTLE_ENDIAN
+    memcpy(&win, p, sizeof(win));
+#else
+    int i;
+    for (win = 0, i = 7; i >= 0; i--)
+        win = win << 8 | (unsigned char)p[i];
+#endif
+    return win;
+}
+
+struct word {
+    const char *buf;
+    Py_ssize_t first;
+    Py_ssize_t last;
+    int slavo_germanic;
+    /* the window at first; several rules test how the word starts */
+    uint64_t head;
+};
+
+/*
+ * Mirrors the `next` tuple of the Python implementation: the characters to
+ * add to the primary and secondary codes and how far to move forward. It is
+ * deliberately not reset between characters, as in the Python version. The
+ * codes must be string literals, so their lengths are known when they are
+ * set and never need to be counted. Likewise whether the two differ is known
+ * where they are set: NEXT is only ever given two different codes.
+ */
+struct next {
+    const char *primary;
+    const char *secondary;
+    unsigned char primary_len;
+    unsigned char secondary_len;
+    unsigned char differ;
+    int advance;
+};
+
+#define SET_NEXT(p, s, a, d) \
+    do { \
+        n->primary = p; n->primary_len = sizeof("" p) - 1; \
+        n->secondary = s; n->secondary_len = sizeof("" s) - 1; \
+        n->differ = (d); \
+        n->advance = (a); \
+    } while (0)
+#define NEXT(p, s, a) SET_NEXT(p, s, (a), 1)
+#define NEXT1(p, a) SET_NEXT(p, p, (a), 0)
+
+static void
+process_c(const struct word *w, Py_ssize_t pos, struct next *n)
+{
+    const Py_ssize_t first = w->first;
+    const uint64_t win = window(w->buf + pos);
+    const uint64_t back = window(w->buf + pos - 2);
+    const uint64_t head = w->head;
+    const char *buf = w->buf;
+
+    /* various germanic */
+    if (pos > first + 1
+        && !IS_VOWEL(buf[pos - 2])
+        && WAT(back >> 8, "ACH")
+        && buf[pos + 2] != 'I'
+        && (buf[pos + 2] != 'E'
+            || WAT(back, "BACHER") || WAT(back, "MACHER"))) {
+        NEXT1("K", 2);
+    }
+    /* special case 'CAESAR' */
+    else if (pos == first && WAT(head, "CAESAR")) {
+        NEXT1("S", 2);
+    }
+    /*
+     * the rest of the rules each apply to one letter after the 'C', so pick
+     * them by that letter rather than testing each in turn
+     */
+    else switch (buf[pos + 1]) {
+    case 'H':
+        /* italian 'chianti' */
+        if (WAT(win >> 16, "IA")) {
+            NEXT1("K", 2);
+        }
+        /* find 'michael' */
+        else if (pos > first && WAT(win >> 16, "AE")) {
+            NEXT("K", "X", 2);
+        }
+        else if (pos == first
+                 && (WAT(win >> 8, "HARAC") || WAT(win >> 8, "HARIS")
+                     || WAT(win >> 8, "HOR") || WAT(win >> 8, "HYM")
+                     || WAT(win >> 8, "HIA") || WAT(win >> 8, "HEM"))
+                 && !WAT(head, "CHORE")) {
+            NEXT1("K", 2);
+        }
+        /* germanic, greek, or otherwise 'ch' for 'kh' sound */
+        else if (WAT(head, "VAN ") || WAT(head, "VON ")
+                 || WAT(head, "SCH")
+                 || WAT(back, "ORCHES") || WAT(back, "ARCHIT")
+                 || WAT(back, "ORCHID")
+                 || IN(buf[pos + 2], "TS")
+                 || ((IN(buf[pos - 1], "AOUE") || pos == first)
+                     && IN(buf[pos + 2], "LRNMBHFVW "))) {
+            NEXT1("K", 2);
+        }
+        else if (pos > first) {
+            if (WAT(head, "MC"))
+                NEXT1("K", 2);
+            else
+                NEXT("X", "K", 2);
+        }
+        else {
+            NEXT1("X", 2);
+        }
+        break;
+    case 'Z':
+        /* e.g, 'czerny' */
+        if (!WAT(back, "WI"))
+            NEXT("S", "X", 2);
+        else
+            NEXT1("K", 1);
+        break;
+    case 'C':
+        /* e.g., 'focaccia' */
+        if (WAT(win >> 16, "IA")) {
+            NEXT1("X", 3);
+        }
+        /* double 'C', but not if e.g. 'McClellan' */
+        else if (!(pos == first + 1 && buf[first] == 'M')) {
+            /* 'bellocchio' but not 'bacchus' */
+            if (IN(buf[pos + 2], "IEH") && !WAT(win >> 16, "HU")) {
+                /* 'accident', 'accede' 'succeed' */
+                if ((pos == first + 1 && buf[first] == 'A')
+                    || WAT(back >> 8, "UCCEE") || WAT(back >> 8, "UCCES"))
+                    NEXT1("KS", 3);
+                /* 'bacci', 'bertucci', other italian */
+                else
+                    NEXT1("X", 3);
+            }
+            else {
+                NEXT1("K", 2);
+            }
+        }
+        else if (!IN(buf[pos + 2], "EI")) {
+            NEXT1("K", 2);
+        }
+        else {
+            NEXT1("K", 1);
+        }
+        break;
+    case 'K': case 'G': case 'Q':
+        NEXT1("K", 2);
+        break;
+    case 'I': case 'E': case 'Y':
+        /* italian vs. english */
+        if (WAT(win, "CIO") || WAT(win, "CIE") || WAT(win, "CIA"))
+            NEXT("S", "X", 2);
+        else
+            NEXT1("S", 2);
+        break;
+    case ' ':
+        /* name sent in 'mac caffrey', 'mac gregor' */
+        if (IN(buf[pos + 2], "CQG"))
+            NEXT1("K", 3);
+        else
+            NEXT1("K", 1);
+        break;
+    default:
+        /* default for 'C' */
+        NEXT1("K", 1);
+        break;
+    }
+}
+
+static void
+process_d(const struct word *w, Py_ssize_t pos, struct next *n)
+{
+    const uint64_t win = window(w->buf + pos);
+
+    if (WAT(win, "DG")) {
+        /* e.g. 'edge' */
+        if (IN(w->buf[pos + 2], "IEY"))
+            NEXT1("J", 3);
+        else
+            NEXT1("TK", 2);
+    }
+    else if (WAT(win, "DT") || WAT(win, "DD")) {
+        NEXT1("T", 2);
+    }
+    else {
+        NEXT1("T", 1);
+    }
+}
+
+static void
+process_g(const struct word *w, Py_ssize_t pos, struct next *n)
+{
+    const Py_ssize_t first = w->first;
+    const uint64_t win = window(w->buf + pos);
+    const uint64_t back = window(w->buf + pos - 2);
+    const uint64_t head = w->head;
+    const char *buf = w->buf;
+
+    if (buf[pos + 1] == 'H') {
+        if (pos > first && !IS_VOWEL(buf[pos - 1])) {
+            NEXT1("K", 2);
+        }
+        else if (pos < first + 3) {
+            /* 'ghislane', ghiradelli */
+            if (pos == first) {
+                if (buf[pos + 2] == 'I')
+                    NEXT1("J", 2);
+                else
+                    NEXT1("K", 2);
+            }
+        }
+        /* Parker's rule (with some further refinements) - e.g., 'hugh' */
+        else if ((pos > first + 1 && IN(buf[pos - 2], "BHD"))
+                 || (pos > first + 2 && IN(buf[pos - 3], "BHD"))
+                 || (pos > first + 3 && IN(buf[pos - 4], "BH"))) {
+            NEXT1("", 2);
+        }
+        /* e.g., 'laugh', 'McLaughlin', 'cough', 'gough', 'rough', 'tough' */
+        else if (pos > first + 2
+                 && buf[pos - 1] == 'U'
+                 && IN(buf[pos - 3], "CGLRT")) {
+            NEXT1("F", 2);
+        }
+        else if (pos > first && buf[pos - 1] != 'I') {
+            NEXT1("K", 2);
+        }
+    }
+    else if (buf[pos + 1] == 'N') {
+        if (pos == first + 1 && IS_VOWEL(buf[first]) && !w->slavo_germanic)
+            NEXT("KN", "N", 2);
+        /* not e.g. 'cagney' */
+        else if (!WAT(win >> 16, "EY")
+                 && buf[pos + 1] != 'Y'
+                 && !w->slavo_germanic)
+            NEXT("N", "KN", 2);
+        else
+            NEXT1("KN", 2);
+    }
+    /* 'tagliaro' */
+    else if (WAT(win >> 8, "LI") && !w->slavo_germanic) {
+        NEXT("KL", "L", 2);
+    }
+    /* -ges-,-gep-,-gel-, -gie- at beginning */
+    else if (pos == first
+             && (buf[pos + 1] == 'Y'
+                 || WAT(win >> 8, "ES") || WAT(win >> 8, "EP")
+                 || WAT(win >> 8, "EB") || WAT(win >> 8, "EL")
+                 || WAT(win >> 8, "EY") || WAT(win >> 8, "IB")
+                 || WAT(win >> 8, "IL") || WAT(win >> 8, "IN")
+                 || WAT(win >> 8, "IE") || WAT(win >> 8, "EI")
+                 || WAT(win >> 8, "ER"))) {
+        NEXT("K", "J", 2);
+    }
+    /* -ger-,  -gy- */
+    else if ((WAT(win >> 8, "ER") || buf[pos + 1] == 'Y')
+             && !WAT(head, "DANGER") && !WAT(head, "RANGER")
+             && !WAT(head, "MANGER")
+             && !IN(buf[pos - 1], "EI")
+             && !WAT(back >> 8, "RGY") && !WAT(back >> 8, "OGY")) {
+        NEXT("K", "J", 2);
+    }
+    /* italian e.g, 'biaggi' */
+    else if (IN(buf[pos + 1], "EIY")
+             || WAT(back >> 8, "AGGI") || WAT(back >> 8, "OGGI")) {
+        /* obvious germanic */
+        if (WAT(head, "VON ") || WAT(head, "VAN ")
+            || WAT(head, "SCH") || WAT(win >> 8, "ET"))
+            NEXT1("K", 2);
+        /* always soft if french ending */
+        else if (WAT(win >> 8, "IER "))
+            NEXT1("J", 2);
+        else
+            NEXT("J", "K", 2);
+    }
+    else if (buf[pos + 1] == 'G') {
+        NEXT1("K", 2);
+    }
+    else {
+        NEXT1("K", 1);
+    }
+}
+
+static void
+process_h(const struct word *w, Py_ssize_t pos, struct next *n)
+{
+    /* only keep if first & before vowel or btw. 2 vowels */
+    if ((pos == w->first || IS_VOWEL(w->buf[pos - 1]))
+        && IS_VOWEL(w->buf[pos + 1]))
+        NEXT1("H", 2);
+    /* (also takes care of 'HH') */
+    else
+        NEXT1("", 1);
+}
+
+static void
+process_j(const struct word *w, Py_ssize_t pos, struct next *n)
+{
+    const Py_ssize_t first = w->first;
+    const uint64_t win = window(w->buf + pos);
+    const char *buf = w->buf;
+    int advance = buf[pos + 1] == 'J' ? 2 : 1;
+
+    /* obvious spanish, 'jose', 'san jacinto' */
+    if (WAT(win, "JOSE") || WAT(w->head, "SAN ")) {
+        if ((pos == first && buf[pos + 4] == ' ') || WAT(w->head, "SAN "))
+            NEXT1("H", advance);
+        else
+            NEXT("J", "H", advance);
+    }
+    /* Yankelovich/Jankelowicz */
+    else if (pos == first && !WAT(win, "JOSE")) {
+        NEXT("J", "A", advance);
+    }
+    /* spanish pron. of e.g. 'bajador' */
+    else if (IS_VOWEL(buf[pos - 1])
+             && !w->slavo_germanic
+             && IN(buf[pos + 1], "AO")) {
+        NEXT("J", "H", advance);
+    }
+    else if (pos == w->last) {
+        NEXT("J", " ", advance);
+    }
+    else if (!IN(buf[pos + 1], "LTKSNMBZ") && !IN(buf[pos - 1], "SKL")) {
+        NEXT1("J", advance);
+    }
+    else {
+        NEXT1("", advance);
+    }
+}
+
+static void
+process_l(const struct word *w, Py_ssize_t pos, struct next *n)
+{
+    const Py_ssize_t last = w->last;
+
+    if (w->buf[pos + 1] == 'L') {
+        const uint64_t back = window(w->buf + pos - 1);
+        const uint64_t end = window(w->buf + last - 1);
+
+        /* spanish e.g. 'cabrillo', 'gallegos' */
+        if ((pos == last - 2
+             && (WAT(back, "ILLO") || WAT(back, "ILLA")
+                 || WAT(back, "ALLE")))
+            || ((WAT(end, "AS") || WAT(end, "OS")
+                 || IN(w->buf[last], "AO"))
+                && WAT(back, "ALLE")))
+            NEXT("L", "", 2);
+        else
+            NEXT1("L", 2);
+    }
+    else {
+        NEXT1("L", 1);
+    }
+}
+
+static void
+process_m(const struct word *w, Py_ssize_t pos, struct next *n)
+{
+    const uint64_t win = window(w->buf + pos);
+
+    if ((WAT(win >> 8, "UMB")
+         && (pos + 1 == w->last || WAT(win >> 16, "ER")))
+        || w->buf[pos + 1] == 'M')
+        NEXT1("M", 2);
+    else
+        NEXT1("M", 1);
+}
+
+static void
+process_p(const struct word *w, Py_ssize_t pos, struct next *n)
+{
+    if (w->buf[pos + 1] == 'H')
+        NEXT1("F", 2);
+    /* also account for "campbell", "raspberry" */
+    else if (IN(w->buf[pos + 1], "PB"))
+        NEXT1("P", 2);
+    else
+        NEXT1("P", 1);
+}
+
+static void
+process_r(const struct word *w, Py_ssize_t pos, struct next *n)
+{
+    const uint64_t back = window(w->buf + pos - 4);
+    int advance = w->buf[pos + 1] == 'R' ? 2 : 1;
+
+    /* french e.g. 'rogier', but exclude 'hochmeier' */
+    if (pos == w->last
+        && !w->slavo_germanic
+        && WAT(back >> 16, "IE")
+        && !WAT(back, "ME") && !WAT(back, "MA"))
+        NEXT("", "R", advance);
+    else
+        NEXT1("R", advance);
+}
+
+static void
+process_s(const struct word *w, Py_ssize_t pos, struct next *n)
+{
+    const Py_ssize_t first = w->first;
+    const uint64_t win = window(w->buf + pos);
+    const uint64_t back = window(w->buf + pos - 2);
+    const uint64_t head = w->head;
+    const char *buf = w->buf;
+
+    /* special cases 'island', 'isle', 'carlisle', 'carlysle' */
+    if (WAT(back >> 8, "ISL") || WAT(back >> 8, "YSL")) {
+        NEXT1("", 1);
+    }
+    /* special case 'sugar-' */
+    else if (pos == first && WAT(head, "SUGAR")) {
+        NEXT("X", "S", 1);
+    }
+    else if (WAT(win, "SH")) {
+        /* germanic */
+        if (WAT(win >> 8, "HEIM") || WAT(win >> 8, "HOEK")
+            || WAT(win >> 8, "HOLM") || WAT(win >> 8, "HOLZ"))
+            NEXT1("S", 2);
+        else
+            NEXT1("X", 2);
+    }
+    /* italian & armenian */
+    else if (WAT(win, "SIO") || WAT(win, "SIA") || WAT(win, "SIAN")) {
+        if (!w->slavo_germanic)
+            NEXT("S", "X", 3);
+        else
+            NEXT1("S", 3);
+    }
+    /*
+     * german & anglicisations, e.g. 'smith' match 'schmidt', 'snider'
+     * match 'schneider' also, -sz- in slavic language altho in hungarian it
+     * is pronounced 's'
+     */
+    else if ((pos == first && IN(buf[pos + 1], "MNLW"))
+             || buf[pos + 1] == 'Z') {
+        NEXT("S", "X", buf[pos + 1] == 'Z' ? 2 : 1);
+    }
+    else if (WAT(win, "SC")) {
+        /* Schlesinger's rule */
+        if (buf[pos + 2] == 'H') {
+            /* dutch origin, e.g. 'school', 'schooner' */
+            if (WAT(win >> 24, "OO") || WAT(win >> 24, "ER")
+                || WAT(win >> 24, "EN") || WAT(win >> 24, "UY")
+                || WAT(win >> 24, "ED") || WAT(win >> 24, "EM")) {
+                /* 'schermerhorn', 'schenker' */
+                if (WAT(win >> 24, "ER") || WAT(win >> 24, "EN"))
+                    NEXT("X", "SK", 3);
+                else
+                    NEXT1("SK", 3);
+            }
+            else if (pos == first
+                     && !IS_VOWEL(buf[first + 3])
+                     && buf[first + 3] != 'W') {
+                NEXT("X", "S", 3);
+            }
+            else {
+                NEXT1("X", 3);
+            }
+        }
+        else if (IN(buf[pos + 2], "IEY")) {
+            NEXT1("S", 3);
+        }
+        else {
+            NEXT1("SK", 3);
+        }
+    }
+    /* french e.g. 'resnais', 'artois' */
+    else if (pos == w->last && (WAT(back, "AI") || WAT(back, "OI"))) {
+        NEXT("", "S", 1);
+    }
+    else {
+        NEXT1("S", IN(buf[pos + 1], "SZ") ? 2 : 1);
+    }
+}
+
+static void
+process_t(const struct word *w, Py_ssize_t pos, struct next *n)
+{
+    const uint64_t win = window(w->buf + pos);
+    const uint64_t head = w->head;
+
+    if (WAT(win, "TION")) {
+        NEXT1("X", 3);
+    }
+    else if (WAT(win, "TIA") || WAT(win, "TCH")) {
+        NEXT1("X", 3);
+    }
+    else if (WAT(win, "TH") || WAT(win, "TTH")) {
+        /* special case 'thomas', 'thames' or germanic */
+        if (WAT(win >> 16, "OM") || WAT(win >> 16, "AM")
+            || WAT(head, "VON ") || WAT(head, "VAN ")
+            || WAT(head, "SCH"))
+            NEXT1("T", 2);
+        else
+            NEXT("0", "T", 2);
+    }
+    else if (IN(w->buf[pos + 1], "TD")) {
+        NEXT1("T", 2);
+    }
+    else {
+        NEXT1("T", 1);
+    }
+}
+
+static void
+process_w(const struct word *w, Py_ssize_t pos, struct next *n)
+{
+    const Py_ssize_t first = w->first;
+    const uint64_t win = window(w->buf + pos);
+    const uint64_t back = window(w->buf + pos - 1);
+    const char *buf = w->buf;
+
+    /* can also be in middle of word */
+    if (WAT(win, "WR")) {
+        NEXT1("R", 2);
+    }
+    else if (pos == first && (IS_VOWEL(buf[pos + 1]) || WAT(win, "WH"))) {
+        /* Wasserman should match Vasserman */
+        if (IS_VOWEL(buf[pos + 1]))
+            NEXT("A", "F", 1);
+        else
+            NEXT1("A", 1);
+    }
+    /* Arnow should match Arnoff */
+    else if ((pos == w->last && IS_VOWEL(buf[pos - 1]))
+             || WAT(back, "EWSKI") || WAT(back, "EWSKY")
+             || WAT(back, "OWSKI") || WAT(back, "OWSKY")
+             || WAT(w->head, "SCH")) {
+        NEXT("", "F", 1);
+    }
+    /* polish e.g. 'filipowicz' */
+    else if (WAT(win, "WICZ") || WAT(win, "WITZ")) {
+        NEXT("TS", "FX", 4);
+    }
+    /* default is to skip it */
+    else {
+        NEXT1("", 1);
+    }
+}
+
+static void
+process_x(const struct word *w, Py_ssize_t pos, struct next *n)
+{
+    const uint64_t back = window(w->buf + pos - 3);
+    int advance = IN(w->buf[pos + 1], "CX") ? 2 : 1;
+
+    /* french e.g. breaux */
+    if (pos == w->last
+        && (WAT(back, "IAU") || WAT(back, "EAU")
+            || WAT(back >> 8, "AU") || WAT(back >> 8, "OU")))
+        NEXT1("", advance);
+    else
+        NEXT1("KS", advance);
+}
+
+static void
+process_z(const struct word *w, Py_ssize_t pos, struct next *n)
+{
+    const uint64_t win = window(w->buf + pos);
+    const char *buf = w->buf;
+    int advance = (buf[pos + 1] == 'Z' || buf[pos + 1] == 'H') ? 2 : 1;
+
+    /* chinese pinyin e.g. 'zhao' */
+    if (buf[pos + 1] == 'H')
+        NEXT1("J", advance);
+    else if (WAT(win >> 8, "ZO") || WAT(win >> 8, "ZI")
+             || WAT(win >> 8, "ZA")
+             || (w->slavo_germanic
+                 && pos > w->first
+                 && buf[pos - 1] != 'T'))
+        NEXT("S", "TS", advance);
+    else
+        NEXT1("S", advance);
+}
+
+#define DOUBLED(letter, code) \
+    NEXT1(code, buf[pos + 1] == (letter) ? 2 : 1)
+
+/*
+ * Encode the padded word in w into primary and secondary, which must each
+ * have room for two characters per input character plus one. Returns the
+ * lengths of the two codes through primary_len and secondary_len, and whether
+ * any step added different characters to each; if none did, the codes are
+ * identical.
+ */
+static int
+encode(const struct word *w, char *primary, Py_ssize_t *primary_len,
+       char *secondary, Py_ssize_t *secondary_len)
+{
+    const char *buf = w->buf;
+    Py_ssize_t pos = w->first;
+    Py_ssize_t plen = 0, slen = 0;
+    int diverged = 0;
+    struct next next = {"", "", 0, 0, 0, 1};
+    struct next *n = &next;
+
+    /* skip these silent letters when at start of word */
+    if (WAT(w->head, "GN") || WAT(w->head, "KN") || WAT(w->head, "PN")
+        || WAT(w->head, "WR") || WAT(w->head, "PS"))
+        pos++;
+    /* Initial 'X' is pronounced 'Z' e.g. 'Xavier' */
+    if (buf[w->first] == 'X') {
+        /* 'Z' maps to 'S' */
+        primary[plen++] = 'S';
+        secondary[slen++] = 'S';
+        pos++;
+    }
+
+    while (pos <= w->last) {
+        switch (buf[pos]) {
+        case 'A': case 'E': case 'I': case 'O': case 'U': case 'Y':
+            /* all init vowels now map to 'A' */
+            if (pos == w->first)
+                NEXT1("A", 1);
+            else
+                NEXT1("", 1);
+            break;
+        case ' ':
+            pos++;
+            continue;
+        case 'B':
+            /* "-mb", e.g., "dumb", already skipped over... see 'M' */
+            DOUBLED('B', "P");
+            break;
+        case 'C': process_c(w, pos, n); break;
+        case 'D': process_d(w, pos, n); break;
+        case 'F': DOUBLED('F', "F"); break;
+        case 'G': process_g(w, pos, n); break;
+        case 'H': process_h(w, pos, n); break;
+        case 'J': process_j(w, pos, n); break;
+        case 'K': DOUBLED('K', "K"); break;
+        case 'L': process_l(w, pos, n); break;
+        case 'M': process_m(w, pos, n); break;
+        case 'N': DOUBLED('N', "N"); break;
+        case 'P': process_p(w, pos, n); break;
+        case 'Q': DOUBLED('Q', "K"); break;
+        case 'R': process_r(w, pos, n); break;
+        case 'S': process_s(w, pos, n); break;
+        case 'T': process_t(w, pos, n); break;
+        case 'V': DOUBLED('V', "F"); break;
+        case 'W': process_w(w, pos, n); break;
+        case 'X': process_x(w, pos, n); break;
+        case 'Z': process_z(w, pos, n); break;
+        default:
+            /* anything else repeats the previous step, as in Python */
+            break;
+        }
+        memcpy(primary + plen, next.primary, next.primary_len);
+        plen += next.primary_len;
+        memcpy(secondary + slen, next.secondary, next.secondary_len);
+        slen += next.secondary_len;
+        diverged |= next.differ;
+        pos += next.advance;
+    }
+    *primary_len = plen;
+    *secondary_len = slen;
+    return diverged;
+}
+
+/*
+ * Each word is encoded in a buffer holding the padded word followed by room
+ * for both codes; the padding lets the rules index beyond the beginning and
+ * end of the word.
+ */
+#define BUFFER_SIZE(length) ((length) + 2 * PAD + 2 * (2 * (length) + 1))
+#define PRIMARY(buf, length) ((buf) + (length) + 2 * PAD)
+#define SECONDARY(buf, length) (PRIMARY(buf, length) + 2 * (length) + 1)
+
+/* Fill in the padding of a buffer; the caller copies the word to buf + PAD. */
+static void
+pad_buffer(char *buf, Py_ssize_t length)
+{
+    memset(buf, ' ', PAD);
+    memset(buf + PAD + length, ' ', PAD);
+}
+
+/*
+ * What Word makes of each of the characters from U+0080 up to LATIN_END once
+ * its accents are stripped and it is upper-cased and encoded as ASCII. This
+ * covers Latin-1 and Latin Extended-A and -B, where each character folds the
+ * same way wherever it appears; 'ß' and 'ŉ' are the two that fold to two
+ * characters. The table is Word(chr(c)).upper.encode('ascii', 'replace') for
+ * each of them.
+ */
+#define LATIN_END 0x250
+
+static const char latin_upper[LATIN_END - 0x80][3] = {
+    /* U+0080 */ "?", "?", "?", "?", "?", "?", "?", "?",
+    /* U+0088 */ "?", "?", "?", "?", "?", "?", "?", "?",
+    /* U+0090 */ "?", "?", "?", "?", "?", "?", "?", "?",
+    /* U+0098 */ "?", "?", "?", "?", "?", "?", "?", "?",
+    /* U+00A0 */ "?", "?", "?", "?", "?", "?", "?", "?",
+    /* U+00A8 */ "?", "?", "?", "?", "?", "?", "?", "?",
+    /* U+00B0 */ "?", "?", "?", "?", "?", "?", "?", "?",
+    /* U+00B8 */ "?", "?", "?", "?", "?", "?", "?", "?",
+    /* U+00C0 */ "A", "A", "A", "A", "A", "A", "?", "S",
+    /* U+00C8 */ "E", "E", "E", "E", "I", "I", "I", "I",
+    /* U+00D0 */ "?", "N", "O", "O", "O", "O", "O", "?",
+    /* U+00D8 */ "?", "U", "U", "U", "U", "Y", "?", "SS",
+    /* U+00E0 */ "A", "A", "A", "A", "A", "A", "?", "S",
+    /* U+00E8 */ "E", "E", "E", "E", "I", "I", "I", "I",
+    /* U+00F0 */ "?", "N", "O", "O", "O", "O", "O", "?",
+    /* U+00F8 */ "?", "U", "U", "U", "U", "Y", "?", "Y",
+    /* U+0100 */ "A", "A", "A", "A", "A", "A", "C", "C",
+    /* U+0108 */ "C", "C", "C", "C", "C", "C", "D", "D",
+    /* U+0110 */ "?", "?", "E", "E", "E", "E", "E", "E",
+    /* U+0118 */ "E", "E", "E", "E", "G", "G", "G", "G",
+    /* U+0120 */ "G", "G", "G", "G", "H", "H", "?", "?",
+    /* U+0128 */ "I", "I", "I", "I", "I", "I", "I", "I",
+    /* U+0130 */ "I", "I", "?", "?", "J", "J", "K", "K",
+    /* U+0138 */ "?", "L", "L", "L", "L", "L", "L", "?",
+    /* U+0140 */ "?", "?", "?", "N", "N", "N", "N", "N",
+    /* U+0148 */ "N", "?N", "?", "?", "O", "O", "O", "O",
+    /* U+0150 */ "O", "O", "?", "?", "R", "R", "R", "R",
+    /* U+0158 */ "R", "R", "S", "S", "S", "S", "S", "S",
+    /* U+0160 */ "S", "S", "T", "T", "T", "T", "?", "?",
+    /* U+0168 */ "U", "U", "U", "U", "U", "U", "U", "U",
+    /* U+0170 */ "U", "U", "U", "U", "W", "W", "Y", "Y",
+    /* U+0178 */ "Y", "Z", "Z", "Z", "Z", "Z", "Z", "S",
+    /* U+0180 */ "?", "?", "?", "?", "?", "?", "?", "?",
+    /* U+0188 */ "?", "?", "?", "?", "?", "?", "?", "?",
+    /* U+0190 */ "?", "?", "?", "?", "?", "?", "?", "?",
+    /* U+0198 */ "?", "?", "?", "?", "?", "?", "?", "?",
+    /* U+01A0 */ "O", "O", "?", "?", "?", "?", "?", "?",
+    /* U+01A8 */ "?", "?", "?", "?", "?", "?", "?", "U",
+    /* U+01B0 */ "U", "?", "?", "?", "?", "?", "?", "?",
+    /* U+01B8 */ "?", "?", "?", "?", "?", "?", "?", "?",
+    /* U+01C0 */ "?", "?", "?", "?", "?", "?", "?", "?",
+    /* U+01C8 */ "?", "?", "?", "?", "?", "A", "A", "I",
+    /* U+01D0 */ "I", "O", "O", "U", "U", "U", "U", "U",
+    /* U+01D8 */ "U", "U", "U", "U", "U", "?", "A", "A",
+    /* U+01E0 */ "A", "A", "?", "?", "?", "?", "G", "G",
+    /* U+01E8 */ "K", "K", "O", "O", "O", "O", "?", "?",
+    /* U+01F0 */ "J", "?", "?", "?", "G", "G", "?", "?",
+    /* U+01F8 */ "N", "N", "A", "A", "?", "?", "?", "?",
+    /* U+0200 */ "A", "A", "A", "A", "E", "E", "E", "E",
+    /* U+0208 */ "I", "I", "I", "I", "O", "O", "O", "O",
+    /* U+0210 */ "R", "R", "R", "R", "U", "U", "U", "U",
+    /* U+0218 */ "S", "S", "T", "T", "?", "?", "H", "H",
+    /* U+0220 */ "?", "?", "?", "?", "?", "?", "A", "A",
+    /* U+0228 */ "E", "E", "O", "O", "O", "O", "O", "O",
+    /* U+0230 */ "O", "O", "Y", "Y", "?", "?", "?", "?",
+    /* U+0238 */ "?", "?", "?", "?", "?", "?", "?", "?",
+    /* U+0240 */ "?", "?", "?", "?", "?", "?", "?", "?",
+    /* U+0248 */ "?", "?", "?", "?", "?", "?", "?", "?",
+};
+
+/*
+ * The length of a str once it is folded by fold(), or -1 if it has a
+ * character from beyond LATIN_END.
+ */
+static Py_ssize_t
+folded_length(PyObject *input)
+{
+    const int kind = PyUnicode_KIND(input);
+    const void *data = PyUnicode_DATA(input);
+    Py_ssize_t i, length = PyUnicode_GET_LENGTH(input), folded = length;
+    Py_UCS4 c;
+
+    if (kind == PyUnicode_1BYTE_KIND && PyUnicode_IS_ASCII(input))
+        return length;
+    for (i = 0; i < length; i++) {
+        c = PyUnicode_READ(kind, data, i);
+        if (c >= LATIN_END)
+            return -1;
+        if (c >= 0x80 && latin_upper[c - 0x80][1] != '\0')
+            folded++;
+    }
+    return folded;
+}
+
+/* Write the upper-cased ASCII form of a str to out, as Word does. */
+static void
+fold(char *out, PyObject *input)
+{
+    const int kind = PyUnicode_KIND(input);
+    const void *data = PyUnicode_DATA(input);
+    Py_ssize_t i, length = PyUnicode_GET_LENGTH(input);
+    Py_UCS4 c;
+
+    for (i = 0; i < length; i++) {
+        c = PyUnicode_READ(kind, data, i);
+        if (c < 0x80) {
+            *out++ = Py_TOUPPER(c);
+        }
+        else {
+            const char *folded = latin_upper[c - 0x80];
+
+            *out++ = folded[0];
+            if (folded[1] != '\0')
+                *out++ = folded[1];
+        }
+    }
+}
+
+/* Word.is_slavo_germanic, in a single pass over the upper-cased word. */
+static int
+is_slavo_germanic(const char *upper, Py_ssize_t length)
+{
+    Py_ssize_t i;
+
+    for (i = 0; i < length; i++) {
+        if (upper[i] == 'W' || upper[i] == 'K')
+            return 1;
+        if (upper[i] == 'C' && i + 1 < length && upper[i + 1] == 'Z')
+            return 1;
+    }
+    return 0;
+}
+
+/*
+ * Encode the padded word in buf, leaving the codes at PRIMARY and SECONDARY.
+ * This doesn't touch any Python object, so it may run without the GIL.
+ */
+static void
+encode_buffer(char *buf, Py_ssize_t length, int slavo_germanic,
+              Py_ssize_t *primary_len, Py_ssize_t *secondary_len)
+{
+    struct word w;
+
+    w.buf = buf;
+    w.first = PAD;
+    w.last = PAD + length - 1;
+    w.slavo_germanic = slavo_germanic;
+    w.head = window(buf + PAD);
+    /*
+     * codes that diverged may since have come back together, e.g. KS and K
+     * then nothing and S, so only those need comparing
+     */
+    if (!encode(&w, PRIMARY(buf, length), primary_len,
+                SECONDARY(buf, length), secondary_len)
+        || (*primary_len == *secondary_len
+            && memcmp(PRIMARY(buf, length), SECONDARY(buf, length),
+                      *primary_len) == 0))
+        *secondary_len = 0;
+}
+
+static PyObject *
+build_codes(const char *buf, Py_ssize_t length,
+            Py_ssize_t primary_len, Py_ssize_t secondary_len)
+{
+    return Py_BuildValue("(s#s#)", PRIMARY(buf, length), primary_len,
+                         SECONDARY(buf, length), secondary_len);
+}
+
+/*
+ * Nearly every word is short enough to be encoded in a buffer on the stack;
+ * only longer ones need one allocated.
+ */
+#define SHORT_WORD 64
+
+struct scratch {
+    char *buf;
+    char stack[BUFFER_SIZE(SHORT_WORD)];
+};
+
+/* Get a buffer for a word of the given length, padded ready for the word. */
+static char *
+get_buffer(struct scratch *scratch, Py_ssize_t length)
+{
+    if (length <= SHORT_WORD)
+        scratch->buf = scratch->stack;
+    else if ((scratch->buf = PyMem_Malloc(BUFFER_SIZE(length))) == NULL) {
+        PyErr_NoMemory();
+        return NULL;
+    }
+    pad_buffer(scratch->buf, length);
+    return scratch->buf;
+}
+
+/* Encode a word already copied into a scratch buffer, which is released. */
+static PyObject *
+encode_word(struct scratch *scratch, Py_ssize_t length)
+{
+    Py_ssize_t primary_len, secondary_len;
+    PyObject *result;
+    char *buf = scratch->buf;
+
+    encode_buffer(buf, length, is_slavo_germanic(buf + PAD, length),
+                  &primary_len, &secondary_len);
+    result = build_codes(buf, length, primary_len, secondary_len);
+    if (buf != scratch->stack)
+        PyMem_Free(buf);
+    return result;
+}
+
+PyDoc_STRVAR(parse_doc,
+"parse(upper) -> (primary, secondary)\n\
+\n\
+Return the double metaphone codes for the upper-cased ASCII bytes of a Word.\n\
+The secondary code is empty when it is identical to the primary.");
+
+static PyObject *
+parse(PyObject *self, PyObject *upper)
+{
+    Py_ssize_t length;
+    struct scratch scratch;
+
+    if (!PyBytes_Check(upper)) {
+        PyErr_Format(PyExc_TypeError, "expected bytes, not %.200s",
+                     Py_TYPE(upper)->tp_name);
+        return NULL;
+    }
+    length = PyBytes_GET_SIZE(upper);
+    if (get_buffer(&scratch, length) == NULL)
+        return NULL;
+    memcpy(scratch.buf + PAD, PyBytes_AS_STRING(upper), length);
+    return encode_word(&scratch, length);
+}
+
+PyDoc_STRVAR(parse_ascii_doc,
+"parse_ascii(input) -> (primary, secondary)\n\
+\n\
+Return the double metaphone codes for an ASCII-only str. Such a string needs\n\
+no decoding or normalization, so this skips Word entirely.");
+
+static PyObject *
+parse_ascii(PyObject *self, PyObject *input)
+{
+    Py_ssize_t length;
+    struct scratch scratch;
+
+    if (!PyUnicode_Check(input) || !PyUnicode_IS_ASCII(input)) {
+        PyErr_SetString(PyExc_ValueError, "input must be an ASCII str");
+        return NULL;
+    }
+    length = PyUnicode_GET_LENGTH(input);
+    if (get_buffer(&scratch, length) == NULL)
+        return NULL;
+    fold(scratch.buf + PAD, input);
+    return encode_word(&scratch, length);
+}
+
+PyDoc_STRVAR(parse_latin_doc,
+"parse_latin(input) -> (primary, secondary)\n\
+\n\
+Return the double metaphone codes for a str with no character beyond U+024F,\n\
+the end of Latin Extended-B. Each of those characters strips, upper-cases\n\
+and encodes the same way wherever it appears, so the word is folded in one\n\
+pass with a table lookup per character rather than through Word.");
+
+static PyObject *
+parse_latin(PyObject *self, PyObject *input)
+{
+    Py_ssize_t length;
+    struct scratch scratch;
+
+    if (!PyUnicode_Check(input) || (length = folded_length(input)) < 0) {
+        PyErr_SetString(PyExc_ValueError,
+                        "input must be a str of characters below U+0250");
+        return NULL;
+    }
+    if (get_buffer(&scratch, length) == NULL)
+        return NULL;
+    fold(scratch.buf + PAD, input);
+    return encode_word(&scratch, length);
+}
+
+/*
+ * Encoding a word takes a fraction of a microsecond, so below this many words
+ * starting threads costs more than it saves.
+ */
+#define PARALLEL_BATCH 4096
+
+PyDoc_STRVAR(parse_many_doc,
+"parse_many(words) -> list of (primary, secondary)\n\
+\n\
+Return the double metaphone codes for each of a sequence of words, each of\n\
+which is either the upper-cased ASCII bytes of a Word, as for parse(), or a\n\
+str of Latin characters, as for parse_latin(). The words are encoded with\n\
+the GIL released, and in parallel if the extension was built with OpenMP.");
+
+static PyObject *
+parse_many(PyObject *self, PyObject *words)
+{
+    PyObject *seq, *item, *codes, *result = NULL;
+    Py_ssize_t count, size = 0, i;
+    Py_ssize_t *lengths = NULL, *primary_lens = NULL, *secondary_lens = NULL;
+    char **bufs = NULL, *arena = NULL;
+
+    if ((seq = PySequence_Fast(words, "expected a sequence")) == NULL)
+        return NULL;
+    count = PySequence_Fast_GET_SIZE(seq);
+    lengths = PyMem_New(Py_ssize_t, count + 1);
+    primary_lens = PyMem_New(Py_ssize_t, count + 1);
+    secondary_lens = PyMem_New(Py_ssize_t, count + 1);
+    bufs = PyMem_New(char *, count + 1);
+    if (lengths == NULL || primary_lens == NULL || secondary_lens == NULL
+        || bufs == NULL) {
+        PyErr_NoMemory();
+        goto done;
+    }
+    for (i = 0; i < count; i++) {
+        item = PySequence_Fast_GET_ITEM(seq, i);
+        if (PyBytes_Check(item))
+            lengths[i] = PyBytes_GET_SIZE(item);
+        else if (!PyUnicode_Check(item)) {
+            PyErr_Format(PyExc_TypeError, "expected bytes or str, not %.200s",
+                         Py_TYPE(item)->tp_name);
+            goto done;
+        }
+        else if ((lengths[i] = folded_length(item)) < 0) {
+            PyErr_SetString(PyExc_ValueError,
+                            "str must be of characters below U+0250");
+            goto done;
+        }
+        size += BUFFER_SIZE(lengths[i]);
+    }
+    /* one allocation for every word's buffer */
+    if ((arena = PyMem_Malloc(size + 1)) == NULL) {
+        PyErr_NoMemory();
+        goto done;
+    }
+    for (i = 0; i < count; i++) {
+        item = PySequence_Fast_GET_ITEM(seq, i);
+        bufs[i] = i ? bufs[i - 1] + BUFFER_SIZE(lengths[i - 1]) : arena;
+        pad_buffer(bufs[i], lengths[i]);
+        if (PyBytes_Check(item)) {
+            memcpy(bufs[i] + PAD, PyBytes_AS_STRING(item), lengths[i]);
+        }
+        else {
+            fold(bufs[i] + PAD, item);
+        }
+    }
+
+    /*
+     * the words are copied out, so no Python object is touched from here;
+     * built with OpenMP, a large batch is also split across the cores
+     */
+    Py_BEGIN_ALLOW_THREADS
+#ifdef _OPENMP
+#pragma omp parallel for schedule(static) if (count >= PARALLEL_BATCH)
+#endif
+    for (i = 0; i < count; i++)
+        encode_buffer(bufs[i], lengths[i],
+                      is_slavo_germanic(bufs[i] + PAD, lengths[i]),
+                      &primary_lens[i], &secondary_lens[i]);
+    Py_END_ALLOW_THREADS
+
+    if ((result = PyList_New(count)) == NULL)
+        goto done;
+    for (i = 0; i < count; i++) {
+        codes = build_codes(bufs[i], lengths[i],
+                            primary_lens[i], secondary_lens[i]);
+        if (codes == NULL) {
+            Py_CLEAR(result);
+            goto done;
+        }
+        PyList_SET_ITEM(result, i, codes);
+    }
+
+done:
+    PyMem_Free(arena);
+    PyMem_Free(bufs);
+    PyMem_Free(secondary_lens);
+    PyMem_Free(primary_lens);
+    PyMem_Free(lengths);
+    Py_DECREF(seq);
+    return result;
+}
+
+static PyMethodDef metaphone_methods[] = {
+    {"parse", parse, METH_O, parse_doc},
+    {"parse_ascii", parse_ascii, METH_O, parse_ascii_doc},
+    {"parse_latin", parse_latin, METH_O, parse_latin_doc},
+    {"parse_many", parse_many, METH_O, parse_many_doc},
+    {NULL, NULL, 0, NULL}
+};
+
+static struct PyModuleDef metaphone_module = {
+    PyModuleDef_HEAD_INIT,
+    "_metaphone",
+    "Native core of the Double Metaphone algorithm.",
+    -1,
+    metaphone_methods
+};
+
+PyMODINIT_FUNC
+PyInit__metaphone(void)
+{
+    return PyModule_Create(&metaphone_module);
+}
@@ -43,617 +43,624 @@ created by Andrew Collins on January 12, 2007, using the C source
                        (0.4; Duncan McGreggor)
   Updated 2013-06    - Enforced unicode literals (0.5; Ian Beaver)
 """
-from __future__ import unicode_literals
-from .word import Word
-
-
-VOWELS = ['A', 'E', 'I', 'O', 'U', 'Y']
-SILENT_STARTERS = ["GN", "KN", "PN", "WR", "PS"]
+import functools
+import warnings
 
+from .word import Word
 
-class DoubleMetaphone(object):
-    """
-    """
-    def __init__(self):
-        self.position = 0
-        self.primary_phone = ""
-        self.secondary_phone = ""
-        # next is used set to a tuple of the next characters in the primary and
-        # secondary codes and to indicate how many characters to move forward
-        # in the string.  The secondary code letter is given only when it is
-        # different than the primary. This is just a trick to make the code
-        # easier to write and read. The default action is to add nothing and
-        # move to next char.
-        self.next = (None, 1)
-
-    def check_word_start(self):
-        # skip these silent letters when at start of word
-        if self.word.get_letters(0, 2) in SILENT_STARTERS:
-            self.position += 1
-        # Initial 'X' is pronounced 'Z' e.g. 'Xavier'
-        if self.word.get_letters(0) == 'X':
-            # 'Z' maps to 'S'
-            self.primary_phone = self.secondary_phone = 'S'
-            self.position += 1
-
-    def process_initial_vowels(self):
-        # XXX do we need this next set? it should already be done...
-        self.next = (None, 1)
-        # all init vowels now map to 'A'
-        if self.position == self.word.start_index:
-            self.next = ('A', 1)
-
-    def process_b(self):
-        # "-mb", e.g., "dumb", already skipped over... see 'M' below
-        if self.word.buffer[self.position + 1] == 'B':
-            self.next = ('P', 2)
-        else:
-            self.next = ('P', 1)
-
-    def process_c(self):
-        buffer = self.word.buffer
-        position = self.position
-        start_index = self.word.start_index
-        # various germanic
-        if (position > start_index + 1
-            and buffer[position - 2] not in VOWELS
-            and buffer[position - 1:self.position + 2] == 'ACH'
-            and buffer[position + 2] not in ['I']
-            and (buffer[position + 2] not in ['E']
-                 or buffer[position - 2:position + 4] in [
-                    'BACHER', 'MACHER'])):
-            self.next = ('K', 2)
-        # special case 'CAESAR'
-        elif (position == start_index
-              and buffer[start_index:start_index + 6] == 'CAESAR'):
-            self.next = ('S', 2)
+try:
+    from ._metaphone import parse as _native_parse
+    from ._metaphone import parse_ascii as _native_parse_ascii
+    from ._metaphone import parse_latin as _native_parse_latin
+    from ._metaphone import parse_many as _native_parse_many
+except ImportError:
+    # the C extension is optional; fall back to the pure Python version
+    _native_parse = _native_parse_ascii = _native_parse_latin = None
+    _native_parse_many = None
+
+VOWELS = frozenset(b'AEIOUY')
+SILENT_STARTERS = frozenset([b"GN", b"KN", b"PN", b"WR", b"PS"])
+# names repeat a lot in real data, so remember the codes of recent inputs
+CACHE_SIZE = 65536
+# the C extension folds strs of characters up to the end of Latin Extended-B
+# itself; anything beyond needs Word
+_LATIN_END = '\u0250'
+# the step for a character that adds nothing
+_SKIP = (None, None, 1)
+
+
+# Each handler below is given the Word, its buffer and the position of the
+# character being encoded, and returns a tuple of the next characters in the
+# primary and secondary codes and how many characters to move forward in the
+# string; None or b'' adds nothing to a code. A handler returns None when the
+# previous step should be repeated.
+
+
+def _process_simple(letter, code):
+    # a handler for a letter that always encodes the same way, skipping over
+    # the letter when it is doubled
+    single = (code, code, 1)
+    double = (code, code, 2)
+
+    def process(word, buffer, position):
+        if buffer[position + 1] == letter:
+            return double
+        return single
+    return process
+
+
+def _process_c(word, buffer, position):
+    start_index = word.start_index
+    # various germanic
+    if (position > start_index + 1
+        and buffer[position - 2] not in VOWELS
+        and buffer[position - 1:position + 2] == b'ACH'
+        and buffer[position + 2] != b'I'[0]
+        and (buffer[position + 2] != b'E'[0]
+             or buffer[position - 2:position + 4] in {
+                b'BACHER', b'MACHER'})):
+        return (b'K', b'K', 2)
+    # special case 'CAESAR'
+    elif (position == start_index
+          and word.prefix == b'CAESAR'):
+        return (b'S', b'S', 2)
+    # the rest of the rules each apply to one letter after the 'C', so pick
+    # them by that letter rather than testing each in turn
+    following = buffer[position + 1]
+    if following == b'H'[0]:
         # italian 'chianti'
-        elif buffer[position:position + 4] == 'CHIA':
-            self.next = ('K', 2)
-        elif buffer[position:position + 2] == 'CH':
-            # find 'michael'
-            if (position > start_index
-                and buffer[position:position + 4] == 'CHAE'):
-                self.next = ('K', 'X', 2)
-            elif (position == start_index
-                  and (buffer[position + 1:position + 6] in ['HARAC', 'HARIS']
-                  or buffer[position + 1:position + 4] in ["HOR", "HYM", "HIA",
-                                                           "HEM"])
-                  and buffer[start_index:start_index + 5] != 'CHORE'):
-                self.next = ('K', 2)
-            # germanic, greek, or otherwise 'ch' for 'kh' sound
-            elif (
-                buffer[start_index:start_index + 4] in ['VAN ', 'VON ']
-                or buffer[start_index:start_index + 3] == 'SCH'
-                or buffer[position - 2:position + 4] in ["ORCHES", "ARCHIT",
-                                                         "ORCHID"]
-                or buffer[position + 2] in ['T', 'S']
-                or (
-                    (buffer[position - 1] in ["A", "O", "U", "E"]
-                     or position == start_index)
-                    and (buffer[position + 2] in [
-                        "L", "R", "N", "M", "B", "H", "F", "V", "W", " "]))):
-                self.next = ('K', 2)
-            else:
-                if position > start_index:
-                    if buffer[start_index:start_index + 2] == 'MC':
-                        self.next = ('K', 2)
-                    else:
-                        self.next = ('X', 'K', 2)
+        if buffer[position + 2:position + 4] == b'IA':
+            return (b'K', b'K', 2)
+        # find 'michael'
+        elif (position > start_index
+              and buffer[position + 2:position + 4] == b'AE'):
+            return (b'K', b'X', 2)
+        elif (position == start_index
+              and (buffer[position + 1:position + 6] in {
+                b'HARAC', b'HARIS'}
+              or buffer[position + 1:position + 4] in {
+                b'HOR', b'HYM', b'HIA', b'HEM'})
+              and not word.prefix.startswith(b'CHORE')):
+            return (b'K', b'K', 2)
+        # germanic, greek, or otherwise 'ch' for 'kh' sound
+        elif (
+            word.is_von_van or word.is_sch
+            or buffer[position - 2:position + 4] in {b'ORCHES', b'ARCHIT',
+                                                     b'ORCHID'}
+            or buffer[position + 2] in b'TS'
+            or (
+                (buffer[position - 1] in b'AOUE'
+                 or position == start_index)
+                and (buffer[position + 2] in b'LRNMBHFVW '))):
+            return (b'K', b'K', 2)
+        else:
+            if position > start_index:
+                if word.is_mc:
+                    return (b'K', b'K', 2)
                 else:
-                    self.next = ('X', 2)
+                    return (b'X', b'K', 2)
+            else:
+                return (b'X', b'X', 2)
+    elif following == b'Z'[0]:
         # e.g, 'czerny'
-        elif (buffer[position:position + 2] == 'CZ'
-              and buffer[position - 2:position + 2] != 'WICZ'):
-            self.next = ('S', 'X', 2)
+        if buffer[position - 2:position] != b'WI':
+            return (b'S', b'X', 2)
+        else:
+            return (b'K', b'K', 1)
+    elif following == b'C'[0]:
         # e.g., 'focaccia'
-        elif buffer[position + 1:position + 4] == 'CIA':
-            self.next = ('X', 3)
+        if buffer[position + 2:position + 4] == b'IA':
+            return (b'X', b'X', 3)
         # double 'C', but not if e.g. 'McClellan'
-        elif (
-            buffer[position:position + 2] == 'CC'
-            and not (position == (start_index + 1)
-                     and buffer[start_index] == 'M')):
+        elif not (position == (start_index + 1)
+                  and buffer[start_index] == b'M'[0]):
             #'bellocchio' but not 'bacchus'
-            if (buffer[position + 2] in ["I", "E", "H"]
-                and buffer[position + 2:position + 4] != 'HU'):
+            if (buffer[position + 2] in b'IEH'
+                and buffer[position + 2:position + 4] != b'HU'):
                 # 'accident', 'accede' 'succeed'
                 if (
                     (position == (start_index + 1)
-                     and buffer[start_index] == 'A')
-                    or buffer[position - 1:position + 4] in [
-                        'UCCEE', 'UCCES']):
-                    self.next = ('KS', 3)
+                     and buffer[start_index] == b'A'[0])
+                    or buffer[position - 1:position + 4] in {
+                        b'UCCEE', b'UCCES'}):
+                    return (b'KS', b'KS', 3)
                 # 'bacci', 'bertucci', other italian
                 else:
-                    self.next = ('X', 3)
-            else:
-                self.next = ('K', 2)
-        elif buffer[position:position + 2] in ["CK", "CG", "CQ"]:
-            self.next = ('K', 2)
-        elif buffer[position:position + 2] in ["CI", "CE", "CY"]:
-            # italian vs. english
-            if buffer[position:position + 3] in ["CIO", "CIE", "CIA"]:
-                self.next = ('S', 'X', 2)
+                    return (b'X', b'X', 3)
             else:
-                self.next = ('S', 2)
+                return (b'K', b'K', 2)
+        elif buffer[position + 2] not in b'EI':
+            return (b'K', b'K', 2)
         else:
-            # name sent in 'mac caffrey', 'mac gregor'
-            if buffer[position + 1:position + 3] in [" C", " Q", " G"]:
-                self.next = ('K', 3)
-            else:
-                if (buffer[position + 1] in ["C", "K", "Q"]
-                    and buffer[position + 1:position + 3] not in ["CE", "CI"]):
-                    self.next = ('K', 2)
-                # default for 'C'
-                else:
-                    self.next = ('K', 1)
-
-    def process_d(self):
-        if self.word.buffer[self.position:self.position + 2] == 'DG':
-            # e.g. 'edge'
-            if self.word.buffer[self.position + 2] in ['I', 'E', 'Y']:
-                self.next = ('J', 3)
-            else:
-                self.next = ('TK', 2)
-        elif self.word.buffer[self.position:self.position + 2] in ['DT', 'DD']:
-            self.next = ('T', 2)
+            return (b'K', b'K', 1)
+    elif following in b'KGQ':
+        return (b'K', b'K', 2)
+    elif following in b'IEY':
+        # italian vs. english
+        if buffer[position:position + 3] in {b'CIO', b'CIE', b'CIA'}:
+            return (b'S', b'X', 2)
         else:
-            self.next = ('T', 1)
-
-    def process_f(self):
-        if self.word.buffer[self.position + 1] == 'F':
-            self.next = ('F', 2)
+            return (b'S', b'S', 2)
+    # name sent in 'mac caffrey', 'mac gregor'
+    elif following == b' '[0] and buffer[position + 2] in b'CQG':
+        return (b'K', b'K', 3)
+    # default for 'C'
+    else:
+        return (b'K', b'K', 1)
+
+
+def _process_d(word, buffer, position):
+    if buffer[position:position + 2] == b'DG':
+        # e.g. 'edge'
+        if buffer[position + 2] in b'IEY':
+            return (b'J', b'J', 3)
         else:
-            self.next = ('F', 1)
-
-    def process_g(self):
-        buffer = self.word.buffer
-        position = self.position
-        start_index = self.word.start_index
-        if buffer[position + 1] == 'H':
-            if (position > start_index
-                and buffer[position - 1] not in VOWELS):
-                self.next = ('K', 2)
-            elif position < (start_index + 3):
-                # 'ghislane', ghiradelli
-                if position == start_index:
-                    if buffer[position + 2] == 'I':
-                        self.next = ('J', 2)
-                    else:
-                        self.next = ('K', 2)
-            # Parker's rule (with some further refinements) - e.g., 'hugh'
-            elif (
-                (position > (start_index + 1)
-                 and buffer[position - 2] in ['B', 'H', 'D'])
-                or (position > (start_index + 2)
-                 and buffer[position - 3] in ['B', 'H', 'D'])
-                or (position > (start_index + 3)
-                 and buffer[position - 4] in ['B', 'H'])):
-                self.next = (None, 2)
-            else:
-                # e.g., 'laugh', 'McLaughlin', 'cough', 'gough', 'rough',
-                # 'tough'
-                if (position > (start_index + 2)
-                    and buffer[position - 1] == 'U'
-                    and buffer[position - 3] in [
-                        "C", "G", "L", "R", "T"]):
-                    self.next = ('F', 2)
+            return (b'TK', b'TK', 2)
+    elif buffer[position:position + 2] in {b'DT', b'DD'}:
+        return (b'T', b'T', 2)
+    else:
+        return (b'T', b'T', 1)
+
+
+def _process_g(word, buffer, position):
+    start_index = word.start_index
+    is_slavo_germanic = word.is_slavo_germanic
+    if buffer[position + 1] == b'H'[0]:
+        if (position > start_index
+            and buffer[position - 1] not in VOWELS):
+            return (b'K', b'K', 2)
+        elif position < (start_index + 3):
+            # 'ghislane', ghiradelli
+            if position == start_index:
+                if buffer[position + 2] == b'I'[0]:
+                    return (b'J', b'J', 2)
                 else:
-                    if (position > start_index
-                        and buffer[position - 1] != 'I'):
-                        self.next = ('K', 2)
-        elif buffer[position + 1] == 'N':
-            if (position == (start_index + 1)
-                and buffer[start_index] in VOWELS
-                and not self.word.is_slavo_germanic):
-                self.next = ('KN', 'N', 2)
-            else:
-                # not e.g. 'cagney'
-                if (buffer[position + 2:position + 4] != 'EY'
-                    and buffer[position + 1] != 'Y'
-                    and not self.word.is_slavo_germanic):
-                    self.next = ('N', 'KN', 2)
-                else:
-                    self.next = ('KN', 2)
-        # 'tagliaro'
-        elif (buffer[position + 1:position + 3] == 'LI'
-              and not self.word.is_slavo_germanic):
-            self.next = ('KL', 'L', 2)
-        # -ges-,-gep-,-gel-, -gie- at beginning
-        elif (position == start_index
-              and (buffer[position + 1] == 'Y'
-              or buffer[position + 1:position + 3] in [
-                "ES", "EP", "EB", "EL", "EY", "IB", "IL", "IN", "IE", "EI",
-                "ER"])):
-            self.next = ('K', 'J', 2)
-        # -ger-,  -gy-
-        elif (
-            (buffer[position + 1:position + 3] == 'ER'
-             or buffer[position + 1] == 'Y')
-            and buffer[start_index:start_index + 6] not in [
-                "DANGER", "RANGER", "MANGER"]
-            and buffer[position - 1] not in ['E', 'I']
-            and buffer[position - 1:position + 2] not in ['RGY', 'OGY']):
-            self.next = ('K', 'J', 2)
-        # italian e.g, 'biaggi'
+                    return (b'K', b'K', 2)
+        # Parker's rule (with some further refinements) - e.g., 'hugh'
         elif (
-            buffer[position + 1] in ['E', 'I', 'Y']
-            or buffer[position - 1:position + 3] in [
-                "AGGI", "OGGI"]):
-            # obvious germanic
-            if (buffer[start_index:start_index + 4] in ['VON ', 'VAN ']
-                or buffer[start_index:start_index + 3] == 'SCH'
-                or buffer[position + 1:position + 3] == 'ET'):
-                self.next = ('K', 2)
-            else:
-                # always soft if french ending
-                if buffer[position + 1:position + 5] == 'IER ':
-                    self.next = ('J', 2)
-                else:
-                    self.next = ('J', 'K', 2)
-        elif buffer[position + 1] == 'G':
-            self.next = ('K', 2)
-        else:
-            self.next = ('K', 1)
-
-    def process_h(self):
-        # only keep if self.word.start_index & before vowel or btw. 2 vowels
-        if ((self.position == self.word.start_index
-             or self.word.buffer[self.position - 1] in VOWELS)
-            and self.word.buffer[self.position + 1] in VOWELS):
-            self.next = ('H', 2)
-        # (also takes care of 'HH')
+            (position > (start_index + 1)
+             and buffer[position - 2] in b'BHD')
+            or (position > (start_index + 2)
+             and buffer[position - 3] in b'BHD')
+            or (position > (start_index + 3)
+             and buffer[position - 4] in b'BH')):
+            return (None, None, 2)
         else:
-            self.next = (None, 1)
-
-    def process_j(self):
-        buffer = self.word.buffer
-        position = self.position
-        start_index = self.word.start_index
-        # obvious spanish, 'jose', 'san jacinto'
-        if (buffer[self.position:self.position + 4] == 'JOSE'
-            or buffer[start_index:start_index + 4] == 'SAN '):
-            if (
-                (position == start_index and buffer[position + 4] == ' ')
-                or buffer[start_index:start_index + 4] == 'SAN '):
-                self.next = ('H', )
+            # e.g., 'laugh', 'McLaughlin', 'cough', 'gough', 'rough',
+            # 'tough'
+            if (position > (start_index + 2)
+                and buffer[position - 1] == b'U'[0]
+                and buffer[position - 3] in b'CGLRT'):
+                return (b'F', b'F', 2)
             else:
-                self.next = ('J', 'H')
-        # Yankelovich/Jankelowicz
-        elif (position == start_index
-              and buffer[self.position:self.position + 4] != 'JOSE'):
-            self.next = ('J', 'A')
+                if (position > start_index
+                    and buffer[position - 1] != b'I'[0]):
+                    return (b'K', b'K', 2)
+    elif buffer[position + 1] == b'N'[0]:
+        if (position == (start_index + 1)
+            and buffer[start_index] in VOWELS
+            and not is_slavo_germanic):
+            return (b'KN', b'N', 2)
         else:
-            # spanish pron. of e.g. 'bajador'
-            if (buffer[position - 1] in VOWELS
-                and not self.word.is_slavo_germanic
-                and buffer[position + 1] in ['A', 'O']):
-                self.next = ('J', 'H')
+            # not e.g. 'cagney'
+            if (buffer[position + 2:position + 4] != b'EY'
+                and buffer[position + 1] != b'Y'[0]
+                and not is_slavo_germanic):
+                return (b'N', b'KN', 2)
             else:
-                if position == self.word.end_index:
-                    self.next = ('J', ' ')
-                else:
-                    if (buffer[position + 1] not in ["L", "T", "K", "S", "N",
-                                               "M", "B", "Z"]
-                        and buffer[position - 1] not in ["S", "K", "L"]):
-                        self.next = ('J',)
-                    else:
-                        self.next = (None, )
-        if buffer[position + 1] == 'J':
-            self.next = self.next + (2,)
-        else:
-            self.next = self.next + (1,)
-
-    def process_k(self):
-        if self.word.buffer[self.position + 1] == 'K':
-            self.next = ('K', 2)
+                return (b'KN', b'KN', 2)
+    # 'tagliaro'
+    elif (buffer[position + 1:position + 3] == b'LI'
+          and not is_slavo_germanic):
+        return (b'KL', b'L', 2)
+    # -ges-,-gep-,-gel-, -gie- at beginning
+    elif (position == start_index
+          and (buffer[position + 1] == b'Y'[0]
+          or buffer[position + 1:position + 3] in {
+            b'ES', b'EP', b'EB', b'EL', b'EY', b'IB', b'IL', b'IN', b'IE',
+            b'EI', b'ER'})):
+        return (b'K', b'J', 2)
+    # -ger-,  -gy-
+    elif (
+        (buffer[position + 1:position + 3] == b'ER'
+         or buffer[position + 1] == b'Y'[0])
+        and word.prefix not in {
+            b'DANGER', b'RANGER', b'MANGER'}
+        and buffer[position - 1] not in b'EI'
+        and buffer[position - 1:position + 2] not in {b'RGY', b'OGY'}):
+        return (b'K', b'J', 2)
+    # italian e.g, 'biaggi'
+    elif (
+        buffer[position + 1] in b'EIY'
+        or buffer[position - 1:position + 3] in {
+            b'AGGI', b'OGGI'}):
+        # obvious germanic
+        if (word.is_von_van or word.is_sch
+            or buffer[position + 1:position + 3] == b'ET'):
+            return (b'K', b'K', 2)
         else:
-            self.next = ('K', 1)
-
-    def process_l(self):
-        buffer = self.word.buffer
-        position = self.position
-        end_index = self.word.end_index
-        if buffer[position + 1] == 'L':
-            # spanish e.g. 'cabrillo', 'gallegos'
-            if ((position == (end_index - 2)
-                 and buffer[position - 1:position + 3] in [
-                    "ILLO", "ILLA", "ALLE"])
-                or ((buffer[end_index - 1:end_index + 1] in ["AS", "OS"]
-                     or buffer[end_index] in ["A", "O"])
-                    and buffer[position - 1:position + 3] == 'ALLE')):
-                self.next = ('L', '', 2)
+            # always soft if french ending
+            if buffer[position + 1:position + 5] == b'IER ':
+                return (b'J', b'J', 2)
             else:
-                self.next = ('L', 2)
+                return (b'J', b'K', 2)
+    elif buffer[position + 1] == b'G'[0]:
+        return (b'K', b'K', 2)
+    else:
+        return (b'K', b'K', 1)
+
+
+def _process_h(word, buffer, position):
+    start_index = word.start_index
+    # only keep if start_index & before vowel or btw. 2 vowels
+    if ((position == start_index
+         or buffer[position - 1] in VOWELS)
+        and buffer[position + 1] in VOWELS):
+        return (b'H', b'H', 2)
+    # (also takes care of 'HH')
+    else:
+        return (None, None, 1)
+
+
+def _process_j(word, buffer, position):
+    start_index = word.start_index
+    end_index = word.end_index
+    is_slavo_germanic = word.is_slavo_germanic
+    advance = 2 if buffer[position + 1] == b'J'[0] else 1
+    # obvious spanish, 'jose', 'san jacinto'
+    if (buffer[position:position + 4] == b'JOSE'
+        or word.prefix.startswith(b'SAN ')):
+        if (
+            (position == start_index and buffer[position + 4] == b' '[0])
+            or word.prefix.startswith(b'SAN ')):
+            return (b'H', b'H', advance)
         else:
-            self.next = ('L', 1)
-
-    def process_m(self):
-        buffer = self.word.buffer
-        position = self.position
-        if ((buffer[position + 1:position + 4] == 'UMB'
-             and (position + 1 == self.word.end_index
-                  or buffer[position + 2:position + 4] == 'ER'))
-            or buffer[position + 1] == 'M'):
-            self.next = ('M', 2)
+            return (b'J', b'H', advance)
+    # Yankelovich/Jankelowicz
+    elif (position == start_index
+          and buffer[position:position + 4] != b'JOSE'):
+        return (b'J', b'A', advance)
+    else:
+        # spanish pron. of e.g. 'bajador'
+        if (buffer[position - 1] in VOWELS
+            and not is_slavo_germanic
+            and buffer[position + 1] in b'AO'):
+            return (b'J', b'H', advance)
         else:
-            self.next = ('M', 1)
-
-    def process_n(self):
-        if self.word.buffer[self.position + 1] == 'N':
-            self.next = ('N', 2)
+            if position == end_index:
+                return (b'J', b' ', advance)
+            else:
+                if (buffer[position + 1] not in b'LTKSNMBZ'
+                    and buffer[position - 1] not in b'SKL'):
+                    return (b'J', b'J', advance)
+                else:
+                    return (None, None, advance)
+
+
+def _process_l(word, buffer, position):
+    end_index = word.end_index
+    if buffer[position + 1] == b'L'[0]:
+        # spanish e.g. 'cabrillo', 'gallegos'
+        if ((position == (end_index - 2)
+             and buffer[position - 1:position + 3] in {
+                b'ILLO', b'ILLA', b'ALLE'})
+            or ((buffer[end_index - 1:end_index + 1] in {b'AS', b'OS'}
+                 or buffer[end_index] in b'AO')
+                and buffer[position - 1:position + 3] == b'ALLE')):
+            return (b'L', b'', 2)
         else:
-            self.next = ('N', 1)
-
-    def process_p(self):
-        if self.word.buffer[self.position + 1] == 'H':
-            self.next = ('F', 2)
-        # also account for "campbell", "raspberry"
-        elif self.word.buffer[self.position + 1] in ['P', 'B']:
-            self.next = ('P', 2)
+            return (b'L', b'L', 2)
+    else:
+        return (b'L', b'L', 1)
+
+
+def _process_m(word, buffer, position):
+    end_index = word.end_index
+    if ((buffer[position + 1:position + 4] == b'UMB'
+         and (position + 1 == end_index
+              or buffer[position + 2:position + 4] == b'ER'))
+        or buffer[position + 1] == b'M'[0]):
+        return (b'M', b'M', 2)
+    else:
+        return (b'M', b'M', 1)
+
+
+def _process_p(word, buffer, position):
+    if buffer[position + 1] == b'H'[0]:
+        return (b'F', b'F', 2)
+    # also account for "campbell", "raspberry"
+    elif buffer[position + 1] in b'PB':
+        return (b'P', b'P', 2)
+    else:
+        return (b'P', b'P', 1)
+
+
+def _process_r(word, buffer, position):
+    end_index = word.end_index
+    is_slavo_germanic = word.is_slavo_germanic
+    advance = 2 if buffer[position + 1] == b'R'[0] else 1
+    # french e.g. 'rogier', but exclude 'hochmeier'
+    if (position == end_index
+        and not is_slavo_germanic
+        and buffer[position - 2:position] == b'IE'
+        and buffer[position - 4:position - 2] not in {b'ME', b'MA'}):
+        return (b'', b'R', advance)
+    else:
+        return (b'R', b'R', advance)
+
+
+def _process_s(word, buffer, position):
+    start_index = word.start_index
+    end_index = word.end_index
+    is_slavo_germanic = word.is_slavo_germanic
+    # special cases 'island', 'isle', 'carlisle', 'carlysle'
+    if buffer[position - 1:position + 2] in {b'ISL', b'YSL'}:
+        return (None, None, 1)
+    # special case 'sugar-'
+    elif (position == start_index
+          and word.prefix.startswith(b'SUGAR')):
+        return (b'X', b'S', 1)
+    elif buffer[position:position + 2] == b'SH':
+        # germanic
+        if buffer[position + 1:position + 5] in {
+            b'HEIM', b'HOEK', b'HOLM', b'HOLZ'}:
+            return (b'S', b'S', 2)
         else:
-            self.next = ('P', 1)
-
-    def process_q(self):
-        if self.word.buffer[self.position + 1] == 'Q':
-            self.next = ('K', 2)
+            return (b'X', b'X', 2)
+    # italian & armenian
+    elif (buffer[position:position + 3] in {b'SIO', b'SIA'}
+          or buffer[position:position + 4] == b'SIAN'):
+        if not is_slavo_germanic:
+            return (b'S', b'X', 3)
         else:
-            self.next = ('K', 1)
-
-    def process_r(self):
-        buffer = self.word.buffer
-        position = self.position
-        end_index = self.word.end_index
-        # french e.g. 'rogier', but exclude 'hochmeier'
-        if (position == end_index
-            and not self.word.is_slavo_germanic
-            and buffer[position - 2:position] == 'IE'
-            and buffer[position - 4:position - 2] not in ['ME', 'MA']):
-            self.next = ('', 'R')
+            return (b'S', b'S', 3)
+    # german & anglicisations, e.g. 'smith' match 'schmidt', 'snider'
+    # match 'schneider' also, -sz- in slavic language altho in
+    # hungarian it is pronounced 's'
+    elif ((position == start_index
+           and buffer[position + 1] in b'MNLW')
+          or buffer[position + 1] == b'Z'[0]):
+        if buffer[position + 1] == b'Z'[0]:
+            return (b'S', b'X', 2)
         else:
-            self.next = ('R',)
-        if buffer[position + 1] == 'R':
-            self.next = self.next + (2,)
-        else:
-            self.next = self.next + (1,)
-
-    def process_s(self):
-        buffer = self.word.buffer
-        position = self.position
-        start_index = self.word.start_index
-        end_index = self.word.end_index
-        # special cases 'island', 'isle', 'carlisle', 'carlysle'
-        if buffer[position - 1:position + 2] in ['ISL', 'YSL']:
-            self.next = (None, 1)
-        # special case 'sugar-'
-        elif (position == start_index
-              and buffer[start_index:start_index + 5] == 'SUGAR'):
-            self.next = ('X', 'S', 1)
-        elif buffer[position:position + 2] == 'SH':
-            # germanic
-            if buffer[position + 1:position + 5] in [
-                "HEIM", "HOEK", "HOLM", "HOLZ"]:
-                self.next = ('S', 2)
-            else:
-                self.next = ('X', 2)
-        # italian & armenian
-        elif (buffer[position:position + 3] in ["SIO", "SIA"]
-              or buffer[position:position + 4] == 'SIAN'):
-            if not self.word.is_slavo_germanic:
-                self.next = ('S', 'X', 3)
-            else:
-                self.next = ('S', 3)
-        # german & anglicisations, e.g. 'smith' match 'schmidt', 'snider'
-        # match 'schneider' also, -sz- in slavic language altho in
-        # hungarian it is pronounced 's'
-        elif ((position == start_index
-               and buffer[position + 1] in ["M", "N", "L", "W"])
-              or buffer[position + 1] == 'Z'):
-            self.next = ('S', 'X')
-            if buffer[position + 1] == 'Z':
-                self.next = self.next + (2,)
-            else:
-                self.next = self.next + (1,)
-        elif buffer[position:position + 2] == 'SC':
-            # Schlesinger's rule
-            if buffer[position + 2] == 'H':
-                # dutch origin, e.g. 'school', 'schooner'
-                if buffer[position + 3:position + 5] in [
-                    "OO", "ER", "EN", "UY", "ED", "EM"]:
-                    # 'schermerhorn', 'schenker'
-                    if buffer[position + 3:position + 5] in ['ER', 'EN']:
-                        self.next = ('X', 'SK', 3)
-                    else:
-                        self.next = ('SK', 3)
+            return (b'S', b'X', 1)
+    elif buffer[position:position + 2] == b'SC':
+        # Schlesinger's rule
+        if buffer[position + 2] == b'H'[0]:
+            # dutch origin, e.g. 'school', 'schooner'
+            if buffer[position + 3:position + 5] in {
+                b'OO', b'ER', b'EN', b'UY', b'ED', b'EM'}:
+                # 'schermerhorn', 'schenker'
+                if buffer[position + 3:position + 5] in {b'ER', b'EN'}:
+                    return (b'X', b'SK', 3)
                 else:
-                    if (position == start_index
-                        and buffer[start_index + 3] not in VOWELS
-                        and buffer[start_index + 3] != 'W'):
-                        self.next = ('X', 'S', 3)
-                    else:
-                        self.next = ('X', 3)
-            elif buffer[position + 2] in ['I', 'E', 'Y']:
-                self.next = ('S', 3)
+                    return (b'SK', b'SK', 3)
             else:
-                self.next = ('SK', 3)
-        # french e.g. 'resnais', 'artois'
-        elif (position == end_index
-              and buffer[position - 2:position] in ['AI', 'OI']):
-            self.next = ('', 'S', 1)
+                if (position == start_index
+                    and buffer[start_index + 3] not in VOWELS
+                    and buffer[start_index + 3] != b'W'[0]):
+                    return (b'X', b'S', 3)
+                else:
+                    return (b'X', b'X', 3)
+        elif buffer[position + 2] in b'IEY':
+            return (b'S', b'S', 3)
         else:
-            self.next = ('S', )
-            if buffer[position + 1] in ['S', 'Z']:
-                self.next = self.next + (2,)
-            else:
-                self.next = self.next + (1,)
-
-    def process_t(self):
-        buffer = self.word.buffer
-        position = self.position
-        start_index = self.word.start_index
-        if buffer[position:position + 4] == 'TION':
-            self.next = ('X', 3)
-        elif buffer[position:position + 3] in ['TIA', 'TCH']:
-            self.next = ('X', 3)
-        elif (buffer[position:position + 2] == 'TH'
-              or buffer[position:position + 3] == 'TTH'):
-            # special case 'thomas', 'thames' or germanic
-            if (buffer[position + 2:position + 4] in ['OM', 'AM']
-                or buffer[start_index:start_index + 4] in ['VON ', 'VAN ']
-                or buffer[start_index:start_index + 3] == 'SCH'):
-                self.next = ('T', 2)
-            else:
-                self.next = ('0', 'T', 2)
-        elif buffer[position + 1] in ['T', 'D']:
-            self.next = ('T', 2)
+            return (b'SK', b'SK', 3)
+    # french e.g. 'resnais', 'artois'
+    elif (position == end_index
+          and buffer[position - 2:position] in {b'AI', b'OI'}):
+        return (b'', b'S', 1)
+    else:
+        if buffer[position + 1] in b'SZ':
+            return (b'S', b'S', 2)
         else:
-            self.next = ('T', 1)
-
-    def process_v(self):
-        if self.word.buffer[self.position + 1] == 'V':
-            self.next = ('F', 2)
+            return (b'S', b'S', 1)
+
+
+def _process_t(word, buffer, position):
+    if buffer[position:position + 4] == b'TION':
+        return (b'X', b'X', 3)
+    elif buffer[position:position + 3] in {b'TIA', b'TCH'}:
+        return (b'X', b'X', 3)
+    elif (buffer[position:position + 2] == b'TH'
+          or buffer[position:position + 3] == b'TTH'):
+        # special case 'thomas', 'thames' or germanic
+        if (buffer[position + 2:position + 4] in {b'OM', b'AM'}
+            or word.is_von_van or word.is_sch):
+            return (b'T', b'T', 2)
         else:
-            self.next = ('F', 1)
-
-    def process_w(self):
-        buffer = self.word.buffer
-        position = self.position
-        start_index = self.word.start_index
-        # can also be in middle of word
-        if buffer[position:position + 2] == 'WR':
-            self.next = ('R', 2)
-        elif (position == start_index
-            and (buffer[position + 1] in VOWELS
-                 or buffer[position:position + 2] == 'WH')):
-            # Wasserman should match Vasserman
-            if buffer[position + 1] in VOWELS:
-                self.next = ('A', 'F', 1)
-            else:
-                self.next = ('A', 1)
-        # Arnow should match Arnoff
-        elif ((position == self.word.end_index
-               and buffer[position - 1] in VOWELS)
-              or buffer[position - 1:position + 4] in [
-                "EWSKI", "EWSKY", "OWSKI", "OWSKY"]
-              or buffer[start_index:start_index + 3] == 'SCH'):
-            self.next = ('', 'F', 1)
-        # polish e.g. 'filipowicz'
-        elif buffer[position:position + 4] in ["WICZ", "WITZ"]:
-            self.next = ('TS', 'FX', 4)
-        else:  # default is to skip it
-            self.next = (None, 1)
-
-    def process_x(self):
-        buffer = self.word.buffer
-        position = self.position
-        # french e.g. breaux
-        self.next = (None, )
-        if not (
-            position == self.word.end_index
-            and (buffer[position - 3:position] in ["IAU", "EAU"]
-                 or buffer[position - 2:position] in ['AU', 'OU'])):
-            self.next = ('KS',)
-        if buffer[position + 1] in ['C', 'X']:
-            self.next = self.next + (2,)
+            return (b'0', b'T', 2)
+    elif buffer[position + 1] in b'TD':
+        return (b'T', b'T', 2)
+    else:
+        return (b'T', b'T', 1)
+
+
+def _process_w(word, buffer, position):
+    start_index = word.start_index
+    end_index = word.end_index
+    # can also be in middle of word
+    if buffer[position:position + 2] == b'WR':
+        return (b'R', b'R', 2)
+    elif (position == start_index
+        and (buffer[position + 1] in VOWELS
+             or buffer[position:position + 2] == b'WH')):
+        # Wasserman should match Vasserman
+        if buffer[position + 1] in VOWELS:
+            return (b'A', b'F', 1)
         else:
-            self.next = self.next + (1,)
+            return (b'A', b'A', 1)
+    # Arnow should match Arnoff
+    elif ((position == end_index
+           and buffer[position - 1] in VOWELS)
+          or buffer[position - 1:position + 4] in {
+            b'EWSKI', b'EWSKY', b'OWSKI', b'OWSKY'}
+          or word.is_sch):
+        return (b'', b'F', 1)
+    # polish e.g. 'filipowicz'
+    elif buffer[position:position + 4] in {b'WICZ', b'WITZ'}:
+        return (b'TS', b'FX', 4)
+    else:  # default is to skip it
+        return (None, None, 1)
+
+
+def _process_x(word, buffer, position):
+    end_index = word.end_index
+    advance = 2 if buffer[position + 1] in b'CX' else 1
+    # french e.g. breaux
+    if (position == end_index
+        and (buffer[position - 3:position] in {b'IAU', b'EAU'}
+             or buffer[position - 2:position] in {b'AU', b'OU'})):
+        return (None, None, advance)
+    else:
+        return (b'KS', b'KS', advance)
+
+
+def _process_z(word, buffer, position):
+    start_index = word.start_index
+    is_slavo_germanic = word.is_slavo_germanic
+    advance = 2 if buffer[position + 1] in b'ZH' else 1
+    # chinese pinyin e.g. 'zhao'
+    if buffer[position + 1] == b'H'[0]:
+        return (b'J', b'J', advance)
+    elif (
+        buffer[position + 1:position + 3] in {
+            b'ZO', b'ZI', b'ZA'}
+        or (is_slavo_germanic
+            and position > start_index
+            and buffer[position - 1] != b'T'[0])):
+        return (b'S', b'TS', advance)
+    else:
+        return (b'S', b'S', advance)
+
+
+def _parse(input):
+    word = Word(input)
+    buffer = word.buffer
+    start_index = word.start_index
+    end_index = word.end_index
+    position = start_index
+    # the codes are built up in place, and decoded when parsing is done
+    primary = bytearray()
+    secondary = bytearray()
+    # skip these silent letters when at start of word
+    if word.prefix[:2] in SILENT_STARTERS:
+        position += 1
+    # Initial 'X' is pronounced 'Z' e.g. 'Xavier'
+    if buffer[start_index] == b'X'[0]:
+        # 'Z' maps to 'S'
+        primary += b'S'
+        secondary += b'S'
+        position += 1
+    # the default action is to add nothing and move to next char
+    next_ = _SKIP
+    # all init vowels now map to 'A'
+    if position == start_index and buffer[position] in VOWELS:
+        primary += b'A'
+        secondary += b'A'
+        position += 1
+        next_ = (b'A', b'A', 1)
+    # loop through chars in word.buffer
+    while position <= end_index:
+        character = buffer[position]
+        handler = _HANDLERS[character]
+        if handler is not None:
+            step = handler(word, buffer, position)
+            if step is not None:
+                next_ = step
+        # any other vowel is skipped
+        elif character in VOWELS:
+            next_ = _SKIP
+            position += 1
+            continue
+        elif character == b' '[0]:
+            position += 1
+            continue
+        # anything else repeats the previous step
+        primary_code, secondary_code, advance = next_
+        if primary_code:
+            primary += primary_code
+        if secondary_code:
+            secondary += secondary_code
+        position += advance
+    if primary == secondary:
+        return (primary.decode('ascii'), '')
+    return (primary.decode('ascii'), secondary.decode('ascii'))
+
+
+# the handler for each upper-cased consonant, indexed by its byte value; one
+# list lookup instead of a chain of comparisons per character. Vowels and
+# spaces have no handler and are dealt with in _parse itself.
+_HANDLERS = [None] * 256
+for _character in b'CDGHJLMPRSTWXZ':
+    _HANDLERS[_character] = globals()['_process_' + chr(_character).lower()]
+# the letters whose code depends on nothing around them; "-mb", e.g., "dumb",
+# is already skipped over by 'M'
+for _character, _code in [
+        (b'B', b'P'), (b'F', b'F'), (b'K', b'K'), (b'N', b'N'), (b'Q', b'K'),
+        (b'V', b'F')]:
+    _HANDLERS[_character[0]] = _process_simple(_character[0], _code)
+del _character, _code
 
-    def process_z(self):
-        # chinese pinyin e.g. 'zhao'
-        if self.word.buffer[self.position + 1] == 'H':
-            self.next = ('J', )
-        elif (
-            self.word.buffer[self.position + 1:self.position + 3] in [
-                "ZO", "ZI", "ZA"]
-            or (self.word.is_slavo_germanic
-                and self.position > self.word.start_index
-                and self.word.buffer[self.position - 1] != 'T')):
-            self.next = ('S', 'TS')
-        else:
-            self.next = ('S', )
-        if (self.word.buffer[self.position + 1] == 'Z'
-            or self.word.buffer[self.position + 1] == 'H'):
-            self.next = self.next + (2,)
-        else:
-            self.next = self.next + (1,)
+
+class DoubleMetaphone(object):
+    """
+    Deprecated; use doublemetaphone, which keeps all of its state in locals.
+    """
+    def __init__(self):
+        warnings.warn(
+            "DoubleMetaphone is deprecated, use doublemetaphone instead",
+            DeprecationWarning, stacklevel=2)
 
     def parse(self, input):
-        self.word = Word(input)
-        self.position = self.word.start_index
-        self.check_word_start()
-        # loop through chars in word.buffer
-        while self.position <= self.word.end_index:
-            character = self.word.buffer[self.position]
-            if character in VOWELS:
-                self.process_initial_vowels()
-            elif character == ' ':
-                self.position += 1
-                continue
-            elif character == 'B':
-                self.process_b()
-            elif character == 'C':
-                self.process_c()
-            elif character == 'D':
-                self.process_d()
-            elif character == 'F':
-                self.process_f()
-            elif character == 'G':
-                self.process_g()
-            elif character == 'H':
-                self.process_h()
-            elif character == 'J':
-                self.process_j()
-            elif character == 'K':
-                self.process_k()
-            elif character == 'L':
-                self.process_l()
-            elif character == 'M':
-                self.process_m()
-            elif character == 'N':
-                self.process_n()
-            elif character == 'P':
-                self.process_p()
-            elif character == 'Q':
-                self.process_q()
-            elif character == 'R':
-                self.process_r()
-            elif character == 'S':
-                self.process_s()
-            elif character == 'T':
-                self.process_t()
-            elif character == 'V':
-                self.process_v()
-            elif character == 'W':
-                self.process_w()
-            elif character == 'X':
-                self.process_x()
-            elif character == 'Z':
-                self.process_z()
-            if len(self.next) == 2:
-                if self.next[0]:
-                    self.primary_phone += self.next[0]
-                    self.secondary_phone += self.next[0]
-                self.position += self.next[1]
-            elif len(self.next) == 3:
-                if self.next[0]:
-                    self.primary_phone += self.next[0]
-                if self.next[1]:
-                    self.secondary_phone += self.next[1]
-                self.position += self.next[2]
-        if self.primary_phone == self.secondary_phone:
-            self.secondary_phone = ""
-        return (self.primary_phone, self.secondary_phone)
+        return _parse(input)
 
 
 # backwards compatibility for the pre-OO implementation
+@functools.lru_cache(maxsize=CACHE_SIZE)
 def doublemetaphone(input):
     """
     Given an input string, return a 2-tuple of the double metaphone codes for
     the provided string. The second element of the tuple will be an empty
     string if it is identical to the first element.
+
+    Results for the most recent CACHE_SIZE inputs are cached.
+    """
+    if _native_parse is None:
+        return _parse(input)
+    if isinstance(input, str):
+        # ASCII needs no decoding or normalization, so skip Word altogether;
+        # the rest of the Latin letters are folded with a table
+        if input.isascii():
+            return _native_parse_ascii(input)
+        if max(input) < _LATIN_END:
+            return _native_parse_latin(input)
+    # ASCII bytes decode to the same characters, so just upper-case them
+    elif isinstance(input, bytes) and input.isascii():
+        return _native_parse(input.upper())
+    # the C extension works out is_slavo_germanic itself
+    return _native_parse(Word(input).upper.encode('ascii', 'replace'))
+
+
+def _prepare(input):
+    if isinstance(input, str) and (
+            input.isascii() or max(input) < _LATIN_END):
+        return input
+    if isinstance(input, bytes) and input.isascii():
+        return input.upper()
+    return Word(input).upper.encode('ascii', 'replace')
+
+
+def doublemetaphone_many(inputs):
+    """
+    Given an iterable of input strings, return a list of the 2-tuples that
+    doublemetaphone would return for each of them. With the C extension, all
+    of the strings are encoded in one call that releases the GIL, so batches
+    can be encoded in parallel from several threads.
     """
-    return DoubleMetaphone().parse(input)
+    if _native_parse_many is None:
+        return [_parse(input) for input in inputs]
+    return _native_parse_many([_prepare(input) for input in inputs])
 
 
 # for backwards compatibility for the old name of the function
@@ -1,8 +1,9 @@
 # -*- coding: utf-8 -*-
-from __future__ import unicode_literals
 import unittest
 
-from metaphone.metaphone import doublemetaphone
+from metaphone import metaphone
+from metaphone.metaphone import (
+    DoubleMetaphone, doublemetaphone, doublemetaphone_many)
 
 
 class MetaphoneTestCase(unittest.TestCase):
@@ -84,6 +85,29 @@ class MetaphoneTestCase(unittest.TestCase):
         result = doublemetaphone('Thumbail')
         self.assertEquals(result, ('0MPL', 'TMPL'))
 
+    def test_cached(self):
+        doublemetaphone.cache_clear()
+        first = doublemetaphone("Schmidt")
+        self.assertIs(doublemetaphone("Schmidt"), first)
+        self.assertEqual(doublemetaphone.cache_info().hits, 1)
+
+    def test_many(self):
+        words = ["Smith", "Schmidt", "", "naïve", b"Bart\xc5\xa1", "Çç"]
+        self.assertEqual(
+            doublemetaphone_many(words),
+            [doublemetaphone(word) for word in words])
+        self.assertEqual(doublemetaphone_many([]), [])
+
+    def test_bytes(self):
+        self.assertEqual(doublemetaphone(b"Schmidt"), ("XMT", "SMT"))
+        self.assertEqual(
+            doublemetaphone("Dvořák".encode("utf-8")), ("TFRK", ""))
+
+    def test_deprecated_class(self):
+        with self.assertWarns(DeprecationWarning):
+            parser = DoubleMetaphone()
+        self.assertEqual(parser.parse("Schmidt"), doublemetaphone("Schmidt"))
+
     def test_homophones(self):
         self.assertEqual(
             doublemetaphone(u"tolled"),
@@ -264,6 +288,14 @@ class MetaphoneTestCase(unittest.TestCase):
         result = doublemetaphone("dowager")
         self.assertEquals(result, ("TKR", "TJR"))
 
+    def test_gn_words(self):
+        result = doublemetaphone("Agnes")
+        self.assertEquals(result, ("AKNS", "ANS"))
+        result = doublemetaphone("Agnew")
+        self.assertEquals(result, ("AKN", "AKNF"))
+        result = doublemetaphone("Signe")
+        self.assertEquals(result, ("SN", "SKN"))
+
     def test_pb_words(self):
         result = doublemetaphone("Campbell")
         self.assertEquals(result, ("KMPL", ""))
@@ -275,3 +307,32 @@ class MetaphoneTestCase(unittest.TestCase):
         self.assertEquals(result, ("TMS", ""))
         result = doublemetaphone("Thames")
         self.assertEquals(result, ("TMS", ""))
+
+
+@unittest.skipIf(metaphone._native_parse is None, "C extension not built")
+class NativeTestCase(unittest.TestCase):
+    """
+    """
+    words = [
+        "aubrey", "richard", "Jose", "cambrillo", "catherine", "geoff",
+        "zhang", "Rapelje", "solilijs", "Schwein", "Through", "Arnow",
+        "Thumbail", "Bartosz", "Jablonski", "Yablonsky", "andestādītu",
+        "français", "bacher", "bellocchio", "focaccia", "tagliaro",
+        "biaggi", "bajador", "gallegos", "San Jacinto", "rogier", "breaux",
+        "Wewski", "schermerhorn", "Charac", "orchestra", "accident",
+        "mac caffrey", "mcclain", "laugh", "hugh", "danger", "dowager",
+        "Campbell", "Thames", "Xavier", "caesar", "michael", "czerny",
+        "filipowicz", "Τι είναι το Unicode;", "ab-c", "agh", "straße",
+        "Müller", "Ærø", "Dvořák", "Łukasz", "Şişli", "ŉ", ""]
+
+    def test_matches_python_implementation(self):
+        for word in self.words:
+            self.assertEqual(
+                doublemetaphone(word), metaphone._parse(word), word)
+
+    def test_parse_ascii_requires_ascii(self):
+        self.assertRaises(ValueError, metaphone._native_parse_ascii, "naïve")
+
+    def test_parse_latin_requires_latin(self):
+        self.assertRaises(
+            ValueError, metaphone._native_parse_latin, "Τι είναι")
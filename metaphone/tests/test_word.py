@@ -14,16 +14,16 @@ class WordTestCase(unittest.TestCase):
         self.assertEqual(word.normalized, "stupendous")
         self.assertEqual(word.upper, "STUPENDOUS")
         self.assertEqual(word.length, 10)
-        self.assertEqual(word.buffer, "  STUPENDOUS      ")
+        self.assertEqual(word.buffer, b"        STUPENDOUS        ")
 
     def test_init_unicode(self):
-        word = Word("Çç")
-        self.assertEqual(word.original, "\xc3\x87\xc3\xa7")
+        word = Word("Çç".encode("utf-8"))
+        self.assertEqual(word.original, b"\xc3\x87\xc3\xa7")
         self.assertEqual(word.decoded, u"ss")
         self.assertEqual(word.normalized, u"ss")
         self.assertEqual(word.upper, u"SS")
         self.assertEqual(word.length, 2)
-        self.assertEqual(word.buffer, u"  SS      ")
+        self.assertEqual(word.buffer, b"        SS        ")
 
         word = Word(u"Çç")
         self.assertEqual(word.original, u"\xc7\xe7")
@@ -31,15 +31,15 @@ class WordTestCase(unittest.TestCase):
         self.assertEqual(word.normalized, u"ss")
         self.assertEqual(word.upper, u"SS")
         self.assertEqual(word.length, 2)
-        self.assertEqual(word.buffer, u"  SS      ")
+        self.assertEqual(word.buffer, b"        SS        ")
 
-        word = Word("naïve")
-        self.assertEqual(word.original, "na\xc3\xafve")
+        word = Word("naïve".encode("utf-8"))
+        self.assertEqual(word.original, b"na\xc3\xafve")
         self.assertEqual(word.decoded, u"na\xefve")
         self.assertEqual(word.normalized, "naive")
         self.assertEqual(word.upper, "NAIVE")
         self.assertEqual(word.length, 5)
-        self.assertEqual(word.buffer, "  NAIVE      ")
+        self.assertEqual(word.buffer, b"        NAIVE        ")
 
         word = Word(u"naïve")
         self.assertEqual(word.original, u"na\xefve")
@@ -47,7 +47,7 @@ class WordTestCase(unittest.TestCase):
         self.assertEqual(word.normalized, "naive")
         self.assertEqual(word.upper, "NAIVE")
         self.assertEqual(word.length, 5)
-        self.assertEqual(word.buffer, "  NAIVE      ")
+        self.assertEqual(word.buffer, b"        NAIVE        ")
 
     def test_is_slavo_germanic(self):
         word = Word("Berkowitz")
@@ -57,20 +57,22 @@ class WordTestCase(unittest.TestCase):
         word = Word("Bob")
         self.assertFalse(word.is_slavo_germanic)
 
-    def test_get_first_letter(self):
-        word = Word("naïve")
-        self.assertEqual(word.get_letters(), "N")
-        self.assertEqual(word.get_letters(0), "N")
-        self.assertEqual(word.get_letters(0, 1), "N")
-
-    def test_first_2_letters(self):
-        word = Word("naïve")
-        self.assertEqual(word.get_letters(0, 2), "NA")
-
-    def test_first_3_letters(self):
-        word = Word("naïve")
-        self.assertEqual(word.get_letters(0, 3), "NAI")
+    def test_word_starts(self):
+        word = Word("van Gogh")
+        self.assertTrue(word.is_von_van)
+        self.assertFalse(word.is_sch)
+        self.assertFalse(word.is_mc)
+        word = Word("Schmidt")
+        self.assertTrue(word.is_sch)
+        word = Word("McGregor")
+        self.assertTrue(word.is_mc)
+        word = Word("Vance")
+        self.assertFalse(word.is_von_van)
 
-    def test_get_4th_letter(self):
+    def test_prefix(self):
         word = Word("naïve")
-        self.assertEqual(word.get_letters(3), "V")
+        self.assertEqual(word.prefix, b"NAIVE ")
+        word = Word("Caesarean")
+        self.assertEqual(word.prefix, b"CAESAR")
+        word = Word("")
+        self.assertEqual(word.prefix, b"      ")
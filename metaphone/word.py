@@ -1,42 +1,71 @@
 # -*- coding: utf-8 -*-
-from __future__ import unicode_literals
 import unicodedata
 
 
+def _strip_accents(text):
+    return ''.join(
+        (c for c in unicodedata.normalize('NFD', text)
+        if unicodedata.category(c) != 'Mn'))
+
+
+# the accented Latin letters mapped to what stripping their accents gives, so
+# that most words can be stripped with a single str.translate
+_STRIP = {}
+for _code in range(0x80, 0x250):
+    _stripped = _strip_accents(chr(_code))
+    if _stripped != chr(_code):
+        _STRIP[_code] = _stripped
+del _code, _stripped
+
+
 class Word(object):
     """
     """
+    # one of these is built for every word encoded; slots keep it small
+    __slots__ = (
+        'original', 'decoded', 'normalized', 'upper', 'length', 'prepad',
+        'start_index', 'end_index', 'postpad', 'buffer', 'prefix',
+        'is_von_van', 'is_sch', 'is_mc', 'is_slavo_germanic')
+
     def __init__(self, input):
         self.original = input
         if isinstance(input, bytes):
             self.decoded = input.decode('utf-8', 'ignore')
         else:
             self.decoded = input
-        self.decoded = self.decoded.replace('\xc7', "s")
-        self.decoded = self.decoded.replace('\xe7', "s")
-        self.normalized = ''.join(
-            (c for c in unicodedata.normalize('NFD', self.decoded)
-            if unicodedata.category(c) != 'Mn'))
+        if self.decoded.isascii():
+            # there are no accents to strip from pure ASCII
+            self.normalized = self.decoded
+        else:
+            self.decoded = self.decoded.replace('\xc7', "s")
+            self.decoded = self.decoded.replace('\xe7', "s")
+            self.normalized = self.decoded.translate(_STRIP)
+            if not self.normalized.isascii():
+                # something the table does not cover; strip it the slow way
+                self.normalized = _strip_accents(self.normalized)
         self.upper = self.normalized.upper()
         self.length = len(self.upper)
-        self.prepad = "  "
+        # the rules look up to four characters behind and five ahead of the
+        # current one; eight spaces on each side, as in the C extension, keep
+        # every such index and slice within the buffer. Spaces, not NULs, as
+        # the rules match a space to find the end of the word.
+        self.prepad = " " * 8
         self.start_index = len(self.prepad)
         self.end_index = self.start_index + self.length - 1
-        self.postpad = "      "
-        # so we can index beyond the begining and end of the input string
-        self.buffer = self.prepad + self.upper + self.postpad
-
-    @property
-    def is_slavo_germanic(self):
-        return (
-            self.upper.find('W') > -1
-            or self.upper.find('K') > -1
-            or self.upper.find('CZ') > -1
-            or self.upper.find('WITZ') > -1)
-
-    def get_letters(self, start=0, end=None):
-        if not end:
-            end = start + 1
-        start = self.start_index + start
-        end = self.start_index + end
-        return self.buffer[start:end]
+        self.postpad = " " * 8
+        # so we can index beyond the begining and end of the input string; as
+        # bytes, indexing yields small ints rather than new str objects
+        self.buffer = (self.prepad + self.upper + self.postpad).encode(
+            'ascii', 'replace')
+        # the start of the word is tested by several rules; slice it once
+        self.prefix = self.buffer[self.start_index:self.start_index + 6]
+        # the germanic and celtic starts several rules ask about
+        self.is_von_van = self.prefix[:4] in (b'VON ', b'VAN ')
+        self.is_sch = self.prefix[:3] == b'SCH'
+        self.is_mc = self.prefix[:2] == b'MC'
+        # computed once here, as the rules consult it many times per word;
+        # 'WITZ' is covered by the test for 'W'
+        self.is_slavo_germanic = (
+            'W' in self.upper
+            or 'K' in self.upper
+            or 'CZ' in self.upper)
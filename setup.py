@@ -1,9 +1,26 @@
-from setuptools import setup, find_packages
+from setuptools import setup, find_packages, Extension
 import io
+import os
 
 from metaphone import meta
 
 
+# profile-guided optimization of the C core with GCC: build with
+# METAPHONE_PGO=generate, run a representative workload, then rebuild with
+# METAPHONE_PGO=use (see the pgo target in the Makefile)
+PGO_DIR = os.path.abspath(os.path.join("build", "pgo"))
+PGO_FLAGS = {
+    "generate": ["-fprofile-generate=" + PGO_DIR],
+    "use": ["-O3", "-fprofile-use=" + PGO_DIR, "-fprofile-correction"],
+    }
+pgo = os.environ.get("METAPHONE_PGO")
+if pgo and pgo not in PGO_FLAGS:
+    raise SystemExit("METAPHONE_PGO must be one of: " + ", ".join(PGO_FLAGS))
+pgo_flags = PGO_FLAGS.get(pgo, [])
+# with METAPHONE_OPENMP=1, doublemetaphone_many spreads large batches of words
+# across cores; this needs a compiler and runtime with OpenMP support
+openmp_flags = ["-fopenmp"] if os.environ.get("METAPHONE_OPENMP") else []
+
 setup(
     name=meta.display_name,
     version=meta.version,
@@ -13,6 +30,16 @@ setup(
     url=meta.url,
     license=meta.license,
     packages=find_packages(),
+    python_requires=">=3.7",
+    # the C core is optional: without a compiler the pure Python version is
+    # used instead
+    ext_modules=[
+        Extension(
+            "metaphone._metaphone", ["metaphone/_metaphone.c"],
+            extra_compile_args=pgo_flags + openmp_flags,
+            extra_link_args=pgo_flags + openmp_flags,
+            optional=True),
+        ],
     long_description=io.open("README.rst", encoding='utf-8').read(),
     tests_require = ['nose'],
     test_suite = 'nose.collector',